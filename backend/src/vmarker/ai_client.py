@@ -1,7 +1,7 @@
 """
 [INPUT]: 依赖 httpx
-[OUTPUT]: 对外提供 AIClient 类
-[POS]: AI API 调用客户端，被 chapter_bar 和未来的 shownotes/subtitle 消费
+[OUTPUT]: 对外提供 AIClient 类, get_client(), close_all_clients()
+[POS]: AI API 调用客户端，被 chapter_bar/shownotes/subtitle 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
@@ -90,10 +90,48 @@ class AIClient:
         return parse_json_response(content)
 
 
+# =============================================================================
+#  共享客户端
+# =============================================================================
+
+_POOL_LIMITS = httpx.Limits(max_keepalive_connections=20, max_connections=50)
+_shared_clients: dict[tuple[str, str, str], AIClient] = {}
+
+
+def get_client(config: AIConfig) -> AIClient:
+    """
+    获取共享 AIClient（按配置缓存）
+
+    底层 httpx 连接池跨调用复用，免去每次请求重建 TCP/TLS 连接。
+    生命周期归进程管理：API 在应用关闭时调用 close_all_clients()，
+    CLI 进程退出时由操作系统回收。
+    """
+    key = (config.api_base, config.api_key, config.model)
+    client = _shared_clients.get(key)
+    if client is None:
+        client = AIClient(config)
+        client._client = httpx.AsyncClient(timeout=config.timeout, limits=_POOL_LIMITS)
+        _shared_clients[key] = client
+    return client
+
+
+async def close_all_clients() -> None:
+    """关闭所有共享客户端"""
+    for client in _shared_clients.values():
+        if client._client:
+            await client._client.aclose()
+            client._client = None
+    _shared_clients.clear()
+
+
 # =============================================================================
 #  工具函数
 # =============================================================================
 
+# 模块级预编译，不占用 re 模块的有限模式缓存位
+_JSON_BODY_RE = re.compile(r"\{[\s\S]*\}")
+
+
 def parse_json_response(content: str) -> dict:
     """
     从 AI 响应中提取 JSON
@@ -111,7 +149,7 @@ def parse_json_response(content: str) -> dict:
         pass
 
     # 提取 JSON 部分（可能被 markdown 代码块包裹）
-    match = re.search(r"\{[\s\S]*\}", content)
+    match = _JSON_BODY_RE.search(content)
     if not match:
         raise ValueError(f"响应中未找到 JSON: {content[:200]}")
 
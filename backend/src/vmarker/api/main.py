@@ -1,29 +1,29 @@
 """
-[INPUT]: 依赖 FastAPI, routes, dotenv
+[INPUT]: 依赖 FastAPI, routes, settings
 [OUTPUT]: 对外提供 app (FastAPI 实例)
 [POS]: FastAPI 应用主入口
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
 from contextlib import asynccontextmanager
-from pathlib import Path
 
-from dotenv import load_dotenv
+import orjson
 from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-
+from fastapi.responses import ORJSONResponse, Response
 
 # =============================================================================
 #  加载环境变量
 # =============================================================================
 
-# 从 backend/.env 加载
-_env_path = Path(__file__).parent.parent.parent.parent / ".env"
-load_dotenv(_env_path)
+# 从 backend/.env 加载（settings 导入时即完成，业务模块随后可见）
+from vmarker.settings import load_env
+
+load_env()
 
 from vmarker import __version__
+from vmarker.ai_client import close_all_clients
 from vmarker.api.routes import auth, chapter_bar, progress_bar, shownotes, subtitle, video, youtube
+from vmarker.temp_manager import cleanup_old_sessions
 
 
 # =============================================================================
@@ -34,14 +34,69 @@ from vmarker.api.routes import auth, chapter_bar, progress_bar, shownotes, subti
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 启动时清理过期的视频处理会话
-    from vmarker.temp_manager import cleanup_old_sessions
-
     cleaned = cleanup_old_sessions(max_age_hours=24)
     if cleaned:
         print(f"[vmarker] 已清理 {cleaned} 个过期会话")
 
     yield
 
+    # 关闭时释放共享 AI 客户端的连接池
+    await close_all_clients()
+
+
+# =============================================================================
+#  CORS 中间件（纯 ASGI）
+# =============================================================================
+
+# 预计算响应头，避免每次请求分配。
+# 认证走 Authorization 头而非 Cookie，CORS 意义上不属于凭据，
+# 因此有意不设 allow-credentials，保持通配 origin
+_CORS_HEADERS: tuple[tuple[bytes, bytes], ...] = (
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-methods", b"*"),
+    (b"access-control-allow-headers", b"*"),
+)
+
+
+class FastCORSMiddleware:
+    """
+    轻量 CORS 中间件
+
+    绕过 Starlette 中间件栈的逐请求开销：
+    OPTIONS 预检直接返回 204，其余请求在 response.start 时追加固定头。
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] == "OPTIONS":
+            # Fetch 规范的 * 通配不覆盖 Authorization，预检必须逐字
+            # 回显请求头列表（与 Starlette CORSMiddleware 行为一致）
+            headers = list(_CORS_HEADERS)
+            for name, value in scope["headers"]:
+                if name == b"access-control-request-headers":
+                    headers[2] = (b"access-control-allow-headers", value)
+                    break
+            await send({
+                "type": "http.response.start",
+                "status": 204,
+                "headers": headers,
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + list(_CORS_HEADERS)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
 
 # =============================================================================
 #  FastAPI 应用
@@ -52,16 +107,11 @@ app = FastAPI(
     description="视频标记工具集 API - Make video structure visible",
     version=__version__,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app.add_middleware(FastCORSMiddleware)
 
 
 # =============================================================================
@@ -69,15 +119,14 @@ app.add_middleware(
 # =============================================================================
 
 
-class HealthResponse(BaseModel):
-    status: str
-    version: str
+# 载荷恒定，导入时序列化一次，避免逐请求的模型构造和 JSON 编码
+_HEALTH_BODY = orjson.dumps({"status": "ok", "version": __version__})
 
 
-@app.get("/health", response_model=HealthResponse)
+@app.get("/health")
 async def health():
     """健康检查"""
-    return HealthResponse(status="ok", version=__version__)
+    return Response(_HEALTH_BODY, media_type="application/json")
 
 
 # =============================================================================
@@ -6,6 +6,8 @@
 """
 
 from fastapi import APIRouter
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
 
 from vmarker.api.auth import AuthUser, CurrentUser, OptionalUser
 
@@ -22,6 +24,12 @@ class MeResponse(AuthUser):
     pass
 
 
+class CheckResponse(BaseModel):
+    """认证状态响应"""
+    authenticated: bool
+    user: AuthUser | None = None
+
+
 # =============================================================================
 #  认证端点
 # =============================================================================
@@ -43,8 +51,8 @@ async def get_me(user: CurrentUser) -> AuthUser:
     return user
 
 
-@router.get("/check")
-async def auth_check(user: OptionalUser) -> dict:
+@router.get("/check", response_class=ORJSONResponse, response_model=CheckResponse)
+async def auth_check(user: OptionalUser) -> CheckResponse:
     """
     检查认证状态（不强制登录）
 
@@ -52,12 +60,7 @@ async def auth_check(user: OptionalUser) -> dict:
     - 未登录：返回 guest 状态
 
     Returns:
-        dict: 认证状态
+        CheckResponse: 认证状态
     """
-    if user is None:
-        return {"authenticated": False, "user": None}
-
-    return {
-        "authenticated": True,
-        "user": user.model_dump(),
-    }
+    # 直接返回模型，序列化走 pydantic 的 Rust 路径，省去 model_dump 中转
+    return CheckResponse(authenticated=user is not None, user=user)
@@ -5,35 +5,72 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import os
+import hashlib
+import shutil
+from collections.abc import AsyncIterator
+from functools import lru_cache
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from tempfile import mkdtemp
 from typing import Annotated
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+import orjson
+from fastapi import APIRouter, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from vmarker import chapter_bar as cb
-from vmarker.models import Chapter, ChapterBarConfig, ChapterValidationResult, ColorScheme, VideoConfig
-from vmarker.parser import decode_srt_bytes, parse_srt
+from vmarker.models import (
+    Chapter,
+    ChapterBarConfig,
+    ChapterValidationResult,
+    ColorScheme,
+    SubtitleFile,
+    VideoConfig,
+)
+from vmarker.parser import decode_srt_bytes, parse_srt, parse_srt_stream
+from vmarker.settings import SETTINGS
 from vmarker.themes import THEMES, get_theme
 
-
 router = APIRouter()
 
 
 # =============================================================================
-#  响应模型
+#  常量
 # =============================================================================
 
-class ThemeInfo(BaseModel):
-    name: str
-    display_name: str
-    played_bg: str
-    unplayed_bg: str
+MAX_SRT_SIZE = 10 * 1024 * 1024  # 10MB
+SRT_CHUNK_SIZE = 1024 * 1024  # 流式读取的分块大小 (1MB)
+
+
+async def _iter_srt_upload(file: UploadFile) -> AsyncIterator[bytes]:
+    """分块读取 SRT 上传内容，超出大小限制时提前拒绝"""
+    total = 0
+    while chunk := await file.read(SRT_CHUNK_SIZE):
+        total += len(chunk)
+        if total > MAX_SRT_SIZE:
+            raise HTTPException(400, f"SRT 文件超出大小限制 ({MAX_SRT_SIZE // 1024 // 1024}MB)")
+        yield chunk
 
 
+async def _parse_srt_upload(file: UploadFile) -> SubtitleFile:
+    """流式解析 SRT 上传，非 UTF-8 编码回退到整体解码"""
+    try:
+        return await parse_srt_stream(_iter_srt_upload(file))
+    except UnicodeDecodeError:
+        # 流式解析仅支持 UTF-8，其他编码重读并整体解码
+        await file.seek(0)
+        buffer = bytearray()
+        async for chunk in _iter_srt_upload(file):
+            buffer.extend(chunk)
+        return parse_srt(decode_srt_bytes(bytes(buffer)))
+
+
+# =============================================================================
+#  响应模型
+# =============================================================================
+
 class ParseResponse(BaseModel):
     subtitle_count: int
     duration: float
@@ -65,18 +102,31 @@ class GenerateRequest(BaseModel):
 #  路由
 # =============================================================================
 
-@router.get("/themes", response_model=list[ThemeInfo])
-async def get_themes():
+# THEMES 是常量，导入时序列化一次即可
+_THEMES_BODY = orjson.dumps([
+    {
+        "name": name,
+        "display_name": scheme.name,
+        "played_bg": scheme.played_bg,
+        "unplayed_bg": scheme.unplayed_bg,
+    }
+    for name, scheme in THEMES.items()
+])
+_THEMES_ETAG = hashlib.md5(_THEMES_BODY).hexdigest()
+
+
+@router.get("/themes")
+async def get_themes(request: Request):
     """获取配色方案列表"""
-    return [
-        ThemeInfo(
-            name=name,
-            display_name=scheme.name,
-            played_bg=scheme.played_bg,
-            unplayed_bg=scheme.unplayed_bg,
-        )
-        for name, scheme in THEMES.items()
-    ]
+    # 载荷恒定，命中 ETag 时直接 304 免去响应体
+    if request.headers.get("if-none-match") == _THEMES_ETAG:
+        return Response(status_code=304)
+
+    return Response(
+        _THEMES_BODY,
+        media_type="application/json",
+        headers={"ETag": _THEMES_ETAG, "Cache-Control": "public, max-age=3600"},
+    )
 
 
 @router.post("/parse", response_model=ParseResponse)
@@ -88,8 +138,7 @@ async def parse_srt_file(
         raise HTTPException(400, "请上传 .srt 文件")
 
     try:
-        content = decode_srt_bytes(await file.read())
-        result = parse_srt(content)
+        result = await _parse_srt_upload(file)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
@@ -103,8 +152,7 @@ async def extract_auto(
 ):
     """自动分段提取章节"""
     try:
-        content = decode_srt_bytes(await file.read())
-        srt = parse_srt(content)
+        srt = await _parse_srt_upload(file)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
@@ -118,16 +166,15 @@ async def extract_ai(
 ):
     """AI 智能分段提取章节"""
     # 从环境变量获取配置（使用 .env 中的变量名）
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
-    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.api_base
+    api_model = SETTINGS.api_model
 
     if not api_key:
         raise HTTPException(400, "未配置 AI API Key，请在 backend/.env 中设置 API_KEY")
 
     try:
-        content = decode_srt_bytes(await file.read())
-        srt = parse_srt(content)
+        srt = await _parse_srt_upload(file)
     except ValueError as e:
         raise HTTPException(400, str(e))
 
@@ -152,6 +199,20 @@ async def validate_chapters(chapters: list[Chapter], duration: float):
     return cb.validate(chapters, duration)
 
 
+@lru_cache(maxsize=64)
+def _build_custom_scheme(played_bg: str, unplayed_bg: str) -> ColorScheme:
+    """构造自定义配色方案（同色组合复用缓存，省去重复验证）"""
+    return ColorScheme(
+        name="自定义",
+        played_bg=played_bg,
+        unplayed_bg=unplayed_bg,
+        played_text="#FFFFFF",
+        unplayed_text="#FFFFFF",
+        indicator="#FFFFFF",
+        separator="#FFFFFF",
+    )
+
+
 @router.post("/generate")
 async def generate_video(request: GenerateRequest):
     """生成章节进度条视频"""
@@ -161,14 +222,9 @@ async def generate_video(request: GenerateRequest):
     # 确定配色方案
     if request.custom_colors:
         # 使用自定义配色
-        scheme = ColorScheme(
-            name="自定义",
-            played_bg=request.custom_colors.played_bg,
-            unplayed_bg=request.custom_colors.unplayed_bg,
-            played_text="#FFFFFF",
-            unplayed_text="#FFFFFF",
-            indicator="#FFFFFF",
-            separator="#FFFFFF",
+        scheme = _build_custom_scheme(
+            request.custom_colors.played_bg,
+            request.custom_colors.unplayed_bg,
         )
     else:
         # 使用预设主题
@@ -196,24 +252,30 @@ async def generate_video(request: GenerateRequest):
         filename = "chapter_bar.mov"
         media_type = "video/quicktime"
 
-    with TemporaryDirectory() as tmpdir:
-        output = Path(tmpdir) / filename
-        try:
-            cb.generate(
-                config,
-                output,
-                format=request.format,
-                scheme=scheme,
-                key_frame_interval=request.key_frame_interval,
-            )
-        except RuntimeError as e:
-            raise HTTPException(500, f"生成失败: {e}")
-
-        # 读取文件内容到内存，避免 TemporaryDirectory 退出后文件消失
-        content = output.read_bytes()
-
-    return Response(
-        content=content,
+    # 持久临时目录 + 响应后台清理，避免把整个视频读进内存
+    tmpdir = mkdtemp()
+    output = Path(tmpdir) / filename
+    try:
+        # Pillow/FFmpeg 是同步阻塞操作，调度到线程池避免阻塞事件循环
+        await run_in_threadpool(
+            cb.generate,
+            config,
+            output,
+            format=request.format,
+            scheme=scheme,
+            key_frame_interval=request.key_frame_interval,
+        )
+    except RuntimeError as e:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise HTTPException(500, f"生成失败: {e}")
+    except BaseException:
+        # 任何其他异常同样不会走到后台清理，先删目录再向上抛
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+
+    return FileResponse(
+        output,
         media_type=media_type,
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        filename=filename,
+        background=BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True),
     )
@@ -5,16 +5,20 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import hashlib
+import shutil
 from pathlib import Path
-from tempfile import TemporaryDirectory
+from tempfile import mkdtemp
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
 from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from vmarker import progress_bar as pb
 
-
 router = APIRouter()
 
 
@@ -22,13 +26,6 @@ router = APIRouter()
 #  请求/响应模型
 # =============================================================================
 
-class ColorOption(BaseModel):
-    name: str
-    display_name: str
-    played: str
-    unplayed: str
-
-
 class GenerateRequest(BaseModel):
     duration: float = Field(..., gt=0, description="视频时长（秒）")
     width: int = Field(1920, ge=100, le=4096, description="视频宽度")
@@ -43,27 +40,40 @@ class GenerateRequest(BaseModel):
 #  路由
 # =============================================================================
 
-@router.get("/colors", response_model=list[ColorOption])
-async def get_colors():
-    """获取可用配色列表"""
-    color_names = {
-        "blue": "科技蓝",
-        "green": "清新绿",
-        "red": "活力红",
-        "purple": "优雅紫",
-        "orange": "活力橙",
-        "white": "简约白",
+_COLOR_NAMES = {
+    "blue": "科技蓝",
+    "green": "清新绿",
+    "red": "活力红",
+    "purple": "优雅紫",
+    "orange": "活力橙",
+    "white": "简约白",
+}
+
+# DEFAULT_COLORS 是常量，导入时序列化一次即可
+_COLORS_BODY = orjson.dumps([
+    {
+        "name": name,
+        "display_name": _COLOR_NAMES.get(name, name),
+        "played": colors["played"],
+        "unplayed": colors["unplayed"],
     }
+    for name, colors in pb.DEFAULT_COLORS.items()
+])
+_COLORS_ETAG = hashlib.md5(_COLORS_BODY).hexdigest()
 
-    return [
-        ColorOption(
-            name=name,
-            display_name=color_names.get(name, name),
-            played=colors["played"],
-            unplayed=colors["unplayed"],
-        )
-        for name, colors in pb.DEFAULT_COLORS.items()
-    ]
+
+@router.get("/colors")
+async def get_colors(request: Request):
+    """获取可用配色列表"""
+    # 载荷恒定，命中 ETag 时直接 304 免去响应体
+    if request.headers.get("if-none-match") == _COLORS_ETAG:
+        return Response(status_code=304)
+
+    return Response(
+        _COLORS_BODY,
+        media_type="application/json",
+        headers={"ETag": _COLORS_ETAG, "Cache-Control": "public, max-age=3600"},
+    )
 
 
 @router.post("/generate")
@@ -91,22 +101,29 @@ async def generate_progress_bar(request: GenerateRequest):
         filename = "progress_bar.mov"
         media_type = "video/quicktime"
 
-    with TemporaryDirectory() as tmpdir:
-        output = Path(tmpdir) / filename
-        try:
-            pb.generate(
-                config,
-                output,
-                format=request.format,
-                key_frame_interval=request.key_frame_interval,
-            )
-        except RuntimeError as e:
-            raise HTTPException(500, f"生成失败: {e}")
-
-        content = output.read_bytes()
-
-    return Response(
-        content=content,
+    # 持久临时目录 + 响应后台清理，避免把整个视频读进内存
+    tmpdir = mkdtemp()
+    output = Path(tmpdir) / filename
+    try:
+        # Pillow/FFmpeg 是同步阻塞操作，调度到线程池避免阻塞事件循环
+        await run_in_threadpool(
+            pb.generate,
+            config,
+            output,
+            format=request.format,
+            key_frame_interval=request.key_frame_interval,
+        )
+    except RuntimeError as e:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise HTTPException(500, f"生成失败: {e}")
+    except BaseException:
+        # 任何其他异常同样不会走到后台清理，先删目录再向上抛
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        raise
+
+    return FileResponse(
+        output,
         media_type=media_type,
-        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+        filename=filename,
+        background=BackgroundTask(shutil.rmtree, tmpdir, ignore_errors=True),
     )
@@ -5,7 +5,6 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import os
 from typing import Annotated
 
 from fastapi import APIRouter, File, HTTPException, UploadFile
@@ -14,7 +13,7 @@ from pydantic import BaseModel
 
 from vmarker import subtitle as sub
 from vmarker.parser import decode_srt_bytes, parse_srt
-
+from vmarker.settings import SETTINGS
 
 router = APIRouter()
 
@@ -48,9 +47,9 @@ async def polish_subtitles(
 ):
     """润色字幕"""
     # 获取 AI 配置
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
-    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.api_base
+    api_model = SETTINGS.api_model
 
     if not api_key:
         raise HTTPException(400, "未配置 AI API Key，请在 backend/.env 中设置 API_KEY")
@@ -102,9 +101,9 @@ async def download_polished(
 ):
     """润色字幕并直接返回 SRT 文件"""
     # 获取 AI 配置
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
-    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.api_base
+    api_model = SETTINGS.api_model
 
     if not api_key:
         raise HTTPException(400, "未配置 AI API Key")
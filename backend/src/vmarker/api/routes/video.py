@@ -5,22 +5,23 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import os
+import asyncio
 from pathlib import Path
 from typing import Annotated
 
+import aiofiles
 from fastapi import APIRouter, File, Form, HTTPException, UploadFile
-from fastapi.responses import Response
+from fastapi.responses import FileResponse
 from pydantic import BaseModel, field_validator
+from starlette.concurrency import run_in_threadpool
 
-from vmarker import asr, chapter_bar as cb, progress_bar as pb, video_composer, video_composer_parallel, video_probe
+from vmarker import video_composer, video_composer_parallel, video_probe
 from vmarker.models import Chapter, ChapterBarConfig, ColorScheme, VideoConfig
-from vmarker.progress_bar import ProgressBarConfig
 from vmarker.parser import parse_srt
+from vmarker.settings import SETTINGS
 from vmarker.temp_manager import TempSession, cleanup_old_sessions, get_session
 from vmarker.themes import THEMES, get_theme
 
-
 router = APIRouter()
 
 
@@ -29,6 +30,7 @@ router = APIRouter()
 # =============================================================================
 
 MAX_FILE_SIZE = 500 * 1024 * 1024  # 500MB
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 流式写入的分块大小 (1MB)
 MAX_DURATION = 300  # 5 分钟
 PARALLEL_THRESHOLD_SECONDS = 180  # 超过 3 分钟自动使用并行合成
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".webm", ".mkv", ".avi"}
@@ -133,20 +135,30 @@ async def upload_video(
     if ext not in ALLOWED_EXTENSIONS:
         raise HTTPException(400, f"不支持的文件格式: {ext}，支持: {', '.join(ALLOWED_EXTENSIONS)}")
 
-    # 读取文件内容
-    content = await file.read()
-
-    # 验证文件大小
-    if len(content) > MAX_FILE_SIZE:
+    # Content-Length 已知时提前拒绝，不消费请求体
+    if file.size is not None and file.size > MAX_FILE_SIZE:
         raise HTTPException(400, f"文件大小超出限制 ({MAX_FILE_SIZE // 1024 // 1024}MB)")
 
-    # 创建会话并保存文件
+    # 创建会话并流式写入，边写边校验大小，避免整文件驻留内存
     session = TempSession()
-    video_path = session.save_upload(f"source{ext}", content)
+    video_path = session.open_upload(f"source{ext}")
+    total = 0
+    try:
+        async with aiofiles.open(video_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                total += len(chunk)
+                if total > MAX_FILE_SIZE:
+                    raise HTTPException(400, f"文件大小超出限制 ({MAX_FILE_SIZE // 1024 // 1024}MB)")
+                await out.write(chunk)
+    except HTTPException:
+        session.cleanup()
+        raise
 
     # 探测视频信息
     try:
-        info = video_probe.validate_video(video_path, MAX_DURATION, MAX_FILE_SIZE / 1024 / 1024)
+        info = await run_in_threadpool(
+            video_probe.validate_video, video_path, MAX_DURATION, MAX_FILE_SIZE / 1024 / 1024
+        )
     except ValueError as e:
         session.cleanup()
         raise HTTPException(400, str(e))
@@ -177,9 +189,9 @@ async def transcribe_video(session_id: str):
     返回字幕数量和 SRT 内容，SRT 内容会保存到会话目录供后续使用。
     """
     # 获取配置
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("ASR_API_BASE", os.getenv("API_BASE", "https://api.openai.com/v1"))
-    model = os.getenv("ASR_MODEL", "whisper-1")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.asr_api_base
+    model = SETTINGS.asr_model
 
     if not api_key:
         raise HTTPException(400, "未配置 API Key，请在 backend/.env 中设置 API_KEY")
@@ -196,7 +208,9 @@ async def transcribe_video(session_id: str):
 
     video_path = video_files[0]
 
-    # ASR 转录
+    # ASR 转录（延迟导入，避免未用到 ASR 时的启动开销）
+    from vmarker import asr
+
     try:
         config = asr.ASRConfig(api_key=api_key, api_base=api_base, model=model)
         srt_content = await asr.transcribe_to_srt(video_path, config)
@@ -260,7 +274,7 @@ async def compose_video(session_id: str, request: ComposeRequest):
         raise HTTPException(404, "未找到上传的视频")
 
     source_video = video_files[0]
-    source_info = video_probe.probe(source_video)
+    source_info = await run_in_threadpool(video_probe.probe, source_video)
 
     # 验证位置参数
     if request.position not in ("top", "bottom"):
@@ -268,11 +282,11 @@ async def compose_video(session_id: str, request: ComposeRequest):
 
     position = video_composer.OverlayPosition.TOP if request.position == "top" else video_composer.OverlayPosition.BOTTOM
 
-    # 根据功能生成 Bar
+    # 选择 Bar 生成函数
     if request.feature == "chapter-bar":
-        bar_path = _generate_chapter_bar(session, source_info, request)
+        generate_bar = _generate_chapter_bar
     elif request.feature == "progress-bar":
-        bar_path = _generate_progress_bar(session, source_info, request)
+        generate_bar = _generate_progress_bar
     else:
         raise HTTPException(400, f"不支持的功能: {request.feature}")
 
@@ -289,27 +303,33 @@ async def compose_video(session_id: str, request: ComposeRequest):
             position=position,
             chunk_seconds=chunk_seconds,
         )
+        # Bar 生成与分片准备互不依赖，并行执行
+        bar_path, prepared = await asyncio.gather(
+            run_in_threadpool(generate_bar, session, source_info, request),
+            run_in_threadpool(video_composer_parallel.prepare_segments, source_video, parallel_config),
+        )
         try:
             await video_composer_parallel.compose_vstack_parallel(
-                source_video, bar_path, output_path, parallel_config
+                source_video, bar_path, output_path, parallel_config, prepared=prepared
             )
         except RuntimeError as e:
             raise HTTPException(500, f"视频合成失败: {e}")
     else:
         # 串行合成
-        compose_config = video_composer.CompositionConfig(position=position)
+        bar_path = await run_in_threadpool(generate_bar, session, source_info, request)
+        compose_config = video_composer.CompositionConfig(position=position, source_info=source_info)
         try:
-            video_composer.compose_vstack(source_video, bar_path, output_path, compose_config)
+            await run_in_threadpool(
+                video_composer.compose_vstack, source_video, bar_path, output_path, compose_config
+            )
         except RuntimeError as e:
             raise HTTPException(500, f"视频合成失败: {e}")
 
-    # 返回合成后的视频
-    content = output_path.read_bytes()
-
-    return Response(
-        content=content,
+    # 流式返回合成后的视频（输出文件由会话生命周期管理）
+    return FileResponse(
+        output_path,
         media_type="video/mp4",
-        headers={"Content-Disposition": 'attachment; filename="composed.mp4"'},
+        filename="composed.mp4",
     )
 
 
@@ -332,7 +352,7 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
         raise HTTPException(404, "未找到上传的视频")
 
     source_video = video_files[0]
-    source_info = video_probe.probe(source_video)
+    source_info = await run_in_threadpool(video_probe.probe, source_video)
 
     # 验证位置参数
     if request.position not in ("top", "bottom"):
@@ -340,11 +360,11 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
 
     position = video_composer.OverlayPosition.TOP if request.position == "top" else video_composer.OverlayPosition.BOTTOM
 
-    # 根据功能生成 Bar
+    # 选择 Bar 生成函数
     if request.feature == "chapter-bar":
-        bar_path = _generate_chapter_bar_parallel(session, source_info, request)
+        generate_bar = _generate_chapter_bar_parallel
     elif request.feature == "progress-bar":
-        bar_path = _generate_progress_bar_parallel(session, source_info, request)
+        generate_bar = _generate_progress_bar_parallel
     else:
         raise HTTPException(400, f"不支持的功能: {request.feature}")
 
@@ -356,25 +376,31 @@ async def compose_video_parallel(session_id: str, request: ComposeParallelReques
         max_workers=request.max_workers or video_composer_parallel.DEFAULT_MAX_WORKERS,
     )
 
+    # Bar 生成与分片准备互不依赖，并行执行
+    bar_path, prepared = await asyncio.gather(
+        run_in_threadpool(generate_bar, session, source_info, request),
+        run_in_threadpool(video_composer_parallel.prepare_segments, source_video, parallel_config),
+    )
+
     try:
         await video_composer_parallel.compose_vstack_parallel(
-            source_video, bar_path, output_path, parallel_config
+            source_video, bar_path, output_path, parallel_config, prepared=prepared
         )
     except RuntimeError as e:
         raise HTTPException(500, f"并行视频合成失败: {e}")
 
-    # 返回合成后的视频
-    content = output_path.read_bytes()
-
-    return Response(
-        content=content,
+    # 流式返回合成后的视频（输出文件由会话生命周期管理）
+    return FileResponse(
+        output_path,
         media_type="video/mp4",
-        headers={"Content-Disposition": 'attachment; filename="composed.mp4"'},
+        filename="composed.mp4",
     )
 
 
 def _generate_chapter_bar(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeRequest) -> Path:
     """生成 Chapter Bar 视频"""
+    from vmarker import chapter_bar as cb
+
     if not request.chapters:
         raise HTTPException(400, "Chapter Bar 需要提供 chapters 参数")
 
@@ -407,6 +433,8 @@ def _generate_chapter_bar(session: TempSession, source_info: video_probe.VideoIn
         format="mp4",
         scheme=scheme,
         key_frame_interval=request.key_frame_interval,
+        # 关键帧压在整秒上：超阈值自动转并行合成时分片按关键帧快速定位
+        gop_seconds=1.0,
     )
 
     return bar_path
@@ -414,6 +442,9 @@ def _generate_chapter_bar(session: TempSession, source_info: video_probe.VideoIn
 
 def _generate_progress_bar(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeRequest) -> Path:
     """生成 Progress Bar 视频"""
+    from vmarker import progress_bar as pb
+    from vmarker.progress_bar import ProgressBarConfig
+
     config = ProgressBarConfig(
         duration=source_info.duration,
         width=source_info.width,
@@ -428,6 +459,8 @@ def _generate_progress_bar(session: TempSession, source_info: video_probe.VideoI
         bar_path,
         format="mp4",
         key_frame_interval=request.key_frame_interval,
+        # 关键帧压在整秒上：超阈值自动转并行合成时分片按关键帧快速定位
+        gop_seconds=1.0,
     )
 
     return bar_path
@@ -435,6 +468,8 @@ def _generate_progress_bar(session: TempSession, source_info: video_probe.VideoI
 
 def _generate_chapter_bar_parallel(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeParallelRequest) -> Path:
     """生成 Chapter Bar 视频（并行模式）"""
+    from vmarker import chapter_bar as cb
+
     if not request.chapters:
         raise HTTPException(400, "Chapter Bar 需要提供 chapters 参数")
 
@@ -467,6 +502,7 @@ def _generate_chapter_bar_parallel(session: TempSession, source_info: video_prob
         format="mp4",
         scheme=scheme,
         key_frame_interval=None,  # 并行模式由内部控制 GOP
+        gop_seconds=1.0,  # 关键帧压在整秒上，分片可直接快速定位
     )
 
     return bar_path
@@ -474,6 +510,9 @@ def _generate_chapter_bar_parallel(session: TempSession, source_info: video_prob
 
 def _generate_progress_bar_parallel(session: TempSession, source_info: video_probe.VideoInfo, request: ComposeParallelRequest) -> Path:
     """生成 Progress Bar 视频（并行模式）"""
+    from vmarker import progress_bar as pb
+    from vmarker.progress_bar import ProgressBarConfig
+
     config = ProgressBarConfig(
         duration=source_info.duration,
         width=source_info.width,
@@ -488,6 +527,7 @@ def _generate_progress_bar_parallel(session: TempSession, source_info: video_pro
         bar_path,
         format="mp4",
         key_frame_interval=None,  # 并行模式由内部控制 GOP
+        gop_seconds=1.0,  # 关键帧压在整秒上，分片可直接快速定位
     )
 
     return bar_path
@@ -5,17 +5,16 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import os
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from vmarker import chapter_bar
 from vmarker.asr import ASRConfig, transcribe_video
+from vmarker.settings import SETTINGS
 from vmarker.temp_manager import TempSession
 from vmarker.youtube_downloader import download_audio, validate_youtube_url
-from vmarker.youtube_transcript import get_transcript, extract_video_id
-
+from vmarker.youtube_transcript import extract_video_id, get_transcript
 
 router = APIRouter()
 
@@ -55,9 +54,9 @@ async def generate_chapters_from_transcript(req: YouTubeRequest):
     流程：获取现有字幕 → AI 分段 → 格式化
     优点：快速、无需登录、不消耗 ASR 配额
     """
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
-    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.api_base
+    api_model = SETTINGS.api_model
 
     if not api_key:
         raise HTTPException(400, "未配置 AI API Key")
@@ -118,11 +117,11 @@ async def generate_chapters_from_download(req: YouTubeRequest):
     流程：下载音频 → ASR 转录 → AI 分段 → 格式化
     适用：视频无字幕时的备选方案
     """
-    api_key = os.getenv("API_KEY", "")
-    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
-    api_model = os.getenv("API_MODEL", "gpt-4o-mini")
-    asr_api_base = os.getenv("ASR_API_BASE", api_base)
-    asr_model = os.getenv("ASR_MODEL", "whisper-1")
+    api_key = SETTINGS.api_key
+    api_base = SETTINGS.api_base
+    api_model = SETTINGS.api_model
+    asr_api_base = SETTINGS.asr_api_base
+    asr_model = SETTINGS.asr_model
 
     if not api_key:
         raise HTTPException(400, "未配置 AI API Key")
@@ -5,12 +5,14 @@
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
-import re
+import asyncio
+from bisect import bisect_left
+from collections.abc import Callable
+from dataclasses import dataclass
 from pathlib import Path
 
 from PIL import Image, ImageDraw
 
-from vmarker.ai_client import AIClient, AIConfig
 from vmarker.models import (
     Chapter,
     ChapterBarConfig,
@@ -55,9 +57,12 @@ def extract_auto(
     num = 1
     start = 0.0
 
+    # 字幕按时间有序，预提起点列表供二分定位，免去逐章节线性扫描
+    starts = [s.start_time for s in subtitles]
+
     while start < duration:
         end = min(start + interval, duration)
-        title = _extract_title(subtitles, start, end) or f"章节 {num}"
+        title = _extract_title(subtitles, starts, start, end) or f"章节 {num}"
         chapters.append(Chapter(title=title, start_time=start, end_time=end))
         start = end
         num += 1
@@ -65,14 +70,18 @@ def extract_auto(
     return ChapterList(chapters=chapters, duration=duration)
 
 
-def _extract_title(subs: list[Subtitle], start: float, end: float) -> str:
-    """从时间段内的字幕提取标题"""
-    segment = [s for s in subs if start <= s.start_time < end]
-    if not segment:
+# 标题中需替换为空格的标点（模块级构建一次）
+_PUNCT_TABLE = str.maketrans({c: " " for c in "，。！？、；：""''…—"})
+
+
+def _extract_title(subs: list[Subtitle], starts: list[float], start: float, end: float) -> str:
+    """从时间段内的字幕提取标题（二分定位首条字幕）"""
+    lo = bisect_left(starts, start)
+    if lo >= len(subs) or subs[lo].start_time >= end:
         return ""
-    text = segment[0].text.strip()
-    # 移除标点
-    text = re.sub(r"[\s，。！？、；：""''…—]+", " ", text).strip()
+    text = subs[lo].text.strip()
+    # 移除标点（translate 单趟 C 级替换，split/join 折叠连续空格）
+    text = " ".join(text.translate(_PUNCT_TABLE).split())
     return text[:15] + "..." if len(text) > 15 else text
 
 
@@ -96,6 +105,57 @@ _AI_PROMPT = """你是视频章节分析专家。分析以下字幕，将视频
 {{"chapters": [{{"title": "标题", "start_time": 0.0, "end_time": 120.0}}, ...]}}"""
 
 
+_AI_WINDOW_PROMPT = """你是视频章节分析专家。分析以下字幕片段（节选自完整视频），将该片段划分为 1-3 个章节。
+
+要求：
+1. 识别主题变化点
+2. 标题简洁有意义（不超过15字）
+3. 使用绝对时间（秒），范围限定在 {start:.1f} - {end:.1f} 秒内
+
+视频总时长: {duration:.1f} 秒
+
+字幕:
+{subtitles}
+
+返回 JSON 格式（不要其他内容）:
+{{"chapters": [{{"title": "标题", "start_time": {start:.1f}, "end_time": {end:.1f}}}, ...]}}"""
+
+# 长视频分窗参数
+_AI_WINDOW_SECONDS = 600  # 每窗 10 分钟
+_AI_WINDOW_OVERLAP = 30  # 相邻窗重叠 30 秒，避免边界丢章节
+_AI_MAX_CONCURRENCY = 10  # 并发请求上限（尊重 RPM 限制）
+
+
+def _parse_ai_chapters(data: dict, duration: float) -> list[Chapter]:
+    """
+    从 AI 响应构造章节列表
+
+    LLM 输出常夹带垃圾条目，先过滤/钳制再构造：时序颠倒的丢弃，
+    越界的钳到 [0, duration]，相邻同名章节合并。净化后的值无需
+    再走 pydantic 验证，model_construct 直接构造。
+    """
+    chapters: list[Chapter] = []
+    for c in data.get("chapters", []):
+        if not isinstance(c, dict):
+            continue
+        try:
+            start = max(0.0, float(c.get("start_time", 0)))
+            end = min(float(c.get("end_time", duration)), duration)
+        except (TypeError, ValueError):
+            continue
+        if start >= end:
+            continue
+
+        title = str(c.get("title", "未命名"))
+        if chapters and title == chapters[-1].title:
+            chapters[-1] = Chapter.model_construct(
+                title=title, start_time=chapters[-1].start_time, end_time=end,
+            )
+        else:
+            chapters.append(Chapter.model_construct(title=title, start_time=start, end_time=end))
+    return chapters
+
+
 async def extract_ai(
     subtitles: list[Subtitle],
     duration: float,
@@ -107,6 +167,9 @@ async def extract_ai(
     """
     使用 AI 智能划分章节
 
+    短视频单次请求；长视频按重叠时间窗拆分后并发请求再合并，
+    既不截断字幕丢上下文，延迟也只取决于最慢的一窗。
+
     Args:
         subtitles: 字幕列表
         duration: 视频总时长
@@ -117,25 +180,61 @@ async def extract_ai(
     Returns:
         ChapterList 实例
     """
-    # 构建字幕文本
-    sub_text = "\n".join(f"[{s.start_time:.1f}s] {s.text}" for s in subtitles)
-    if len(sub_text) > 15000:
-        sub_text = sub_text[:15000] + "\n...(已截断)"
-
-    prompt = _AI_PROMPT.format(duration=duration, subtitles=sub_text)
+    # 函数内导入：ai_client 连带 httpx，只在 AI 提取路径加载，
+    # 纯 auto/generate 的 CLI 冷启动不用付这笔导入开销
+    from vmarker.ai_client import AIConfig, get_client
 
     config = AIConfig(api_key=api_key, api_base=api_base, model=model)
-    async with AIClient(config) as client:
-        data = await client.chat_json(prompt)
-
-    chapters = [
-        Chapter(
-            title=str(c.get("title", "未命名")),
-            start_time=float(c.get("start_time", 0)),
-            end_time=float(c.get("end_time", duration)),
+
+    # 提示词行整体只格式化一遍：短视频全量取用，
+    # 长视频各窗口按切片复用，重叠区不再重复格式化
+    lines = [f"[{s.start_time:.1f}s] {s.text}" for s in subtitles]
+
+    # 短视频：整体一次请求
+    if duration <= _AI_WINDOW_SECONDS:
+        sub_text = "\n".join(lines)
+        if len(sub_text) > 15000:
+            sub_text = sub_text[:15000] + "\n...(已截断)"
+
+        prompt = _AI_PROMPT.format(duration=duration, subtitles=sub_text)
+        data = await get_client(config).chat_json(prompt)
+        return ChapterList(chapters=_parse_ai_chapters(data, duration), duration=duration)
+
+    # 长视频：重叠时间窗并发请求
+    windows: list[tuple[float, float]] = []
+    start = 0.0
+    while start < duration:
+        windows.append((start, min(start + _AI_WINDOW_SECONDS, duration)))
+        start += _AI_WINDOW_SECONDS - _AI_WINDOW_OVERLAP
+
+    semaphore = asyncio.Semaphore(_AI_MAX_CONCURRENCY)
+    client = get_client(config)
+
+    # 字幕按时间有序，窗口边界二分定位取切片，
+    # 免去每个窗口对全量字幕的线性过滤
+    starts = [s.start_time for s in subtitles]
+
+    async def _extract_window(win_start: float, win_end: float) -> list[Chapter]:
+        lo, hi = bisect_left(starts, win_start), bisect_left(starts, win_end)
+        if lo == hi:
+            return []
+        sub_text = "\n".join(lines[lo:hi])
+        prompt = _AI_WINDOW_PROMPT.format(
+            start=win_start, end=win_end, duration=duration, subtitles=sub_text,
         )
-        for c in data.get("chapters", [])
-    ]
+        async with semaphore:
+            data = await client.chat_json(prompt)
+        return _parse_ai_chapters(data, duration)
+
+    results = await asyncio.gather(*(_extract_window(s, e) for s, e in windows))
+
+    # 合并：按开始时间排序，窗重叠区内起点过近的视为重复丢弃
+    merged = sorted((ch for win in results for ch in win), key=lambda c: c.start_time)
+    chapters: list[Chapter] = []
+    for ch in merged:
+        if chapters and ch.start_time - chapters[-1].start_time < _AI_WINDOW_OVERLAP:
+            continue
+        chapters.append(ch)
 
     return ChapterList(chapters=chapters, duration=duration)
 
@@ -162,10 +261,14 @@ def validate(chapters: list[Chapter], duration: float) -> ChapterValidationResul
         issues.append(ValidationIssue(code="EMPTY", message="章节列表为空", blocking=True))
         return ChapterValidationResult(valid=False, issues=issues, chapters=[])
 
-    # 复制并排序
-    fixed = sorted([c.model_copy() for c in chapters], key=lambda c: c.start_time)
+    # 常见路径（extract_auto / 规整的 AI 输出）本就有序，O(N) 检查命中即免排序；
+    # 修正时构造新对象，不会改写调用方实例，无需逐个复制
+    if all(chapters[i].start_time <= chapters[i + 1].start_time for i in range(len(chapters) - 1)):
+        fixed = chapters
+    else:
+        fixed = sorted(chapters, key=lambda c: c.start_time)
 
-    # 阻塞性检查
+    # 阻塞性检查（时序/越界/重叠单趟完成）
     for i, ch in enumerate(fixed):
         if ch.end_time < ch.start_time:
             issues.append(ValidationIssue(
@@ -181,10 +284,7 @@ def validate(chapters: list[Chapter], duration: float) -> ChapterValidationResul
                 blocking=True,
                 index=i,
             ))
-
-    # 重叠检查
-    for i in range(len(fixed) - 1):
-        if fixed[i].end_time > fixed[i + 1].start_time:
+        if i + 1 < len(fixed) and ch.end_time > fixed[i + 1].start_time:
             issues.append(ValidationIssue(
                 code="OVERLAP",
                 message=f"章节 {i+1} 与 {i+2} 时间重叠",
@@ -196,7 +296,11 @@ def validate(chapters: list[Chapter], duration: float) -> ChapterValidationResul
     if any(i.blocking for i in issues):
         return ChapterValidationResult(valid=False, issues=issues, chapters=fixed)
 
-    # 警告检查
+    # 警告检查与间隙修正融合为一趟遍历。
+    # 输入已通过阻塞性检查，修正值无需再走 pydantic 验证，
+    # model_construct 直接构造；未修正的章节原样复用
+    result: list[Chapter] = []
+    last = len(fixed) - 1
     for i, ch in enumerate(fixed):
         if not ch.title.strip():
             issues.append(ValidationIssue(
@@ -213,19 +317,6 @@ def validate(chapters: list[Chapter], duration: float) -> ChapterValidationResul
                 index=i,
             ))
 
-    # 自动修正间隙
-    fixed = _fix_gaps(fixed, duration)
-
-    return ChapterValidationResult(valid=True, issues=issues, chapters=fixed)
-
-
-def _fix_gaps(chapters: list[Chapter], duration: float) -> list[Chapter]:
-    """修正章节间隙"""
-    if not chapters:
-        return chapters
-
-    result = []
-    for i, ch in enumerate(chapters):
         start = ch.start_time
         end = ch.end_time
 
@@ -235,28 +326,53 @@ def _fix_gaps(chapters: list[Chapter], duration: float) -> list[Chapter]:
 
         # 中间间隙：归属到前一章节
         if i > 0 and result[-1].end_time < start:
-            result[-1] = Chapter(
+            result[-1] = Chapter.model_construct(
                 title=result[-1].title,
                 start_time=result[-1].start_time,
                 end_time=start,
             )
 
         # 结尾间隙
-        if i == len(chapters) - 1 and end < duration:
+        if i == last and end < duration:
             end = duration
 
         # 超出时长截断
         end = min(end, duration)
 
-        result.append(Chapter(title=ch.title, start_time=start, end_time=end))
+        if start == ch.start_time and end == ch.end_time:
+            result.append(ch)
+        else:
+            result.append(Chapter.model_construct(title=ch.title, start_time=start, end_time=end))
 
-    return result
+    return ChapterValidationResult(valid=True, issues=issues, chapters=result)
 
 
 # =============================================================================
 #  视频生成
 # =============================================================================
 
+@dataclass(frozen=True)
+class _SchemeRGBA:
+    """配色方案的 RGBA 预换算，逐帧绘制路径只接触整数元组"""
+    played_bg: tuple[int, int, int, int]
+    unplayed_bg: tuple[int, int, int, int]
+    played_text: tuple[int, int, int, int]
+    unplayed_text: tuple[int, int, int, int]
+    indicator: tuple[int, int, int, int]
+    separator: tuple[int, int, int, int]
+
+    @classmethod
+    def from_scheme(cls, scheme: ColorScheme) -> "_SchemeRGBA":
+        return cls(
+            played_bg=hex_to_rgba(scheme.played_bg),
+            unplayed_bg=hex_to_rgba(scheme.unplayed_bg),
+            played_text=hex_to_rgba(scheme.played_text),
+            unplayed_text=hex_to_rgba(scheme.unplayed_text),
+            indicator=hex_to_rgba(scheme.indicator),
+            separator=hex_to_rgba(scheme.separator),
+        )
+
+
 def generate(
     config: ChapterBarConfig,
     output_path: str | Path,
@@ -265,6 +381,7 @@ def generate(
     format: str = "mp4",
     scheme: ColorScheme | None = None,
     key_frame_interval: float | None = None,
+    gop_seconds: float | None = None,
 ) -> Path:
     """
     生成章节进度条视频
@@ -276,6 +393,7 @@ def generate(
         format: 输出格式 ("mp4" 通用格式 / "mov" 透明背景)
         scheme: 配色方案（可选，不传则使用 config.theme）
         key_frame_interval: 关键帧间隔（秒），设置后只渲染关键帧并用 FFmpeg 补帧
+        gop_seconds: 固定 GOP 间隔（秒），仅 mp4 有效，供分片合成按关键帧定位
 
     Returns:
         输出文件路径
@@ -286,9 +404,11 @@ def generate(
     video = config.video
 
     encoder = VideoEncoder(video.width, video.height, video.fps)
-
-    def render(current_time: float) -> Image.Image:
-        return _render_frame(config.chapters, config.duration, current_time, video, scheme)
+    colors = _SchemeRGBA.from_scheme(scheme)
+    # mp4 最终转 yuv420p 丢弃透明度，RGB 画布省去 1/4 的逐帧字节量；
+    # 仅 mov（透明背景）保留 RGBA
+    mode = "RGB" if format == "mp4" else "RGBA"
+    render = _make_frame_renderer(config.chapters, config.duration, video, colors, mode)
 
     return encoder.encode(
         config.duration,
@@ -297,80 +417,156 @@ def generate(
         progress_callback=progress_callback,
         format=format,
         key_frame_interval=key_frame_interval,
+        gop_seconds=gop_seconds,
     )
 
 
-def _render_frame(
+def _make_frame_renderer(
     chapters: list[Chapter],
     duration: float,
-    current_time: float,
     video: VideoConfig,
-    scheme: ColorScheme,
-) -> Image.Image:
-    """渲染单帧"""
+    colors: _SchemeRGBA,
+    mode: str = "RGBA",
+) -> Callable[[float], Image.Image]:
+    """
+    构造绑定常量的帧渲染闭包
+
+    一次生成内尺寸、章节像素边界、字体、配色都不变，只有播放头
+    位置逐帧变化。预先换算并绑定为闭包局部变量，逐帧路径不再做
+    属性查找和边界换算。
+    """
     w, h = video.width, video.height
-    img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
     font = get_font(max(12, h // 3))
-
+    measure = ImageDraw.Draw(Image.new("RGBA", (1, 1)))
+    bounds = []
     for ch in chapters:
-        _draw_chapter(draw, ch, duration, current_time, w, h, scheme, font)
+        x1 = int(ch.start_time / duration * w)
+        x2 = int(ch.end_time / duration * w)
+        # 标题截断和测量每章节只做一次，两张底图共用
+        layout = _prepare_title_layout(measure, ch.title, x1, x2, h, font)
+        bounds.append((ch, x1, x2, layout))
+
+    # 只有播放头位置逐帧变化，章节背景/标题/分隔线全部时不变。
+    # 预渲染"全部已播放"和"全部未播放"两张底图（含全部文字排版），
+    # 逐帧只做底图拷贝 + 已播放区裁剪覆盖 + 指示器盖章
+    def _build_base(state_time: float) -> Image.Image:
+        base = Image.new(mode, (w, h), (0, 0, 0, 0))
+        draw = ImageDraw.Draw(base)
+        for ch, x1, x2, layout in bounds:
+            _draw_chapter(draw, ch, x1, x2, layout, duration, state_time, w, h, colors, font)
+        return base
+
+    unplayed_base = _build_base(0.0)
+    played_base = _build_base(duration)
+
+    # 画布跨帧复用：编码循环按时间递增调用，每帧只推进边界条带、
+    # 恢复旧指示器覆盖的列并盖上新指示器，免去逐帧整幅拷贝
+    canvas = unplayed_base.copy()
+    prev_px = 0
+    prev_ind: tuple[int, int] | None = None
+
+    def _restore(lo: int, hi: int) -> None:
+        """把 [lo, hi) 列恢复为当前边界下的底图内容"""
+        mid = min(max(prev_px, lo), hi)
+        if lo < mid:
+            canvas.paste(played_base.crop((lo, 0, mid, h)), (lo, 0))
+        if mid < hi:
+            canvas.paste(unplayed_base.crop((mid, 0, hi, h)), (mid, 0))
+
+    def render(current_time: float) -> Image.Image:
+        nonlocal prev_px, prev_ind
+        px = int(current_time / duration * w)
 
-    # 指示器
-    x = int(current_time / duration * w)
-    draw.rectangle([x - 1, 0, x + 1, h], fill=hex_to_rgba(scheme.indicator))
+        # 恢复上一帧指示器盖住的列
+        if prev_ind is not None:
+            _restore(*prev_ind)
 
-    return img
+        # 推进（或回退）播放边界条带
+        if px > prev_px:
+            canvas.paste(played_base.crop((prev_px, 0, px, h)), (prev_px, 0))
+        elif px < prev_px:
+            canvas.paste(unplayed_base.crop((px, 0, prev_px, h)), (px, 0))
+        prev_px = px
+
+        # 指示器
+        lo, hi = max(0, px - 1), min(w, px + 2)
+        canvas.paste(colors.indicator, (lo, 0, hi, h))
+        prev_ind = (lo, hi)
+
+        return canvas
+
+    return render
+
+
+def _prepare_title_layout(
+    draw: ImageDraw.ImageDraw,
+    title: str,
+    x1: int,
+    x2: int,
+    height: int,
+    font,
+) -> tuple[str, int, int]:
+    """截断标题并计算居中位置（每章节仅计算一次）"""
+    cw = x2 - x1
+    bbox = draw.textbbox((0, 0), title, font=font)
+    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+    if tw > cw - 10 and cw > 10:
+        # 宽度随前缀长度单调，可对截断点二分，
+        # textbbox 调用次数从 O(标题长度) 降到 O(log 标题长度)
+        lo, hi = 1, max(1, len(title) - 1)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            bbox = draw.textbbox((0, 0), title[:mid] + "...", font=font)
+            if bbox[2] - bbox[0] <= cw - 10:
+                lo = mid
+            else:
+                hi = mid - 1
+        title = title[:lo] + "..."
+        bbox = draw.textbbox((0, 0), title, font=font)
+        tw = bbox[2] - bbox[0]
+
+    tx = x1 + (cw - tw) // 2
+    ty = (height - th) // 2
+    return title, tx, ty
 
 
 def _draw_chapter(
     draw: ImageDraw.ImageDraw,
     ch: Chapter,
+    x1: int,
+    x2: int,
+    layout: tuple[str, int, int],
     duration: float,
     current_time: float,
     width: int,
     height: int,
-    scheme: ColorScheme,
+    colors: _SchemeRGBA,
     font,
 ) -> None:
     """绘制单个章节"""
-    x1 = int(ch.start_time / duration * width)
-    x2 = int(ch.end_time / duration * width)
-    cw = x2 - x1
 
     # 绘制背景
     if current_time >= ch.end_time:
-        bg = hex_to_rgba(scheme.played_bg)
-        fg = hex_to_rgba(scheme.played_text)
+        bg = colors.played_bg
+        fg = colors.played_text
     elif current_time <= ch.start_time:
-        bg = hex_to_rgba(scheme.unplayed_bg)
-        fg = hex_to_rgba(scheme.unplayed_text)
+        bg = colors.unplayed_bg
+        fg = colors.unplayed_text
     else:
         px = int(current_time / duration * width)
-        draw.rectangle([x1, 0, px, height], fill=hex_to_rgba(scheme.played_bg))
-        draw.rectangle([px, 0, x2, height], fill=hex_to_rgba(scheme.unplayed_bg))
+        draw.rectangle([x1, 0, px, height], fill=colors.played_bg)
+        draw.rectangle([px, 0, x2, height], fill=colors.unplayed_bg)
         bg = None
-        fg = hex_to_rgba(scheme.played_text)
+        fg = colors.played_text
 
     if bg:
         draw.rectangle([x1, 0, x2, height], fill=bg)
 
-    # 绘制标题
-    title = ch.title
-    bbox = draw.textbbox((0, 0), title, font=font)
-    tw, th = bbox[2] - bbox[0], bbox[3] - bbox[1]
-
-    if tw > cw - 10 and cw > 10:
-        while tw > cw - 10 and len(title) > 1:
-            title = title[:-1]
-            bbox = draw.textbbox((0, 0), title + "...", font=font)
-            tw = bbox[2] - bbox[0]
-        title = title + "..."
-
-    tx = x1 + (cw - tw) // 2
-    ty = (height - th) // 2
+    # 绘制标题（排版已预计算）
+    title, tx, ty = layout
     draw.text((tx, ty), title, font=font, fill=fg)
 
     # 绘制分隔线
     if ch.end_time < duration:
-        draw.rectangle([x2 - 2, 0, x2, height], fill=hex_to_rgba(scheme.separator))
+        draw.rectangle([x2 - 2, 0, x2, height], fill=colors.separator)
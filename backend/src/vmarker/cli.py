@@ -1,5 +1,5 @@
 """
-[INPUT]: 依赖 typer, rich, dotenv, chapter_bar, parser, themes
+[INPUT]: 依赖 typer, rich, settings, chapter_bar, parser, themes
 [OUTPUT]: 对外提供 app (通用入口), acb_app (Chapter Bar 专用入口)
 [POS]: CLI 入口点，提供命令行界面
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
@@ -11,10 +11,11 @@ from pathlib import Path
 from typing import Annotated, Optional
 
 import typer
-from dotenv import load_dotenv
+
+from vmarker.settings import load_env
 
 # 加载 .env 文件
-load_dotenv()
+load_env()
 from rich.console import Console
 from rich.progress import BarColumn, Progress, SpinnerColumn, TaskProgressColumn, TextColumn
 from rich.table import Table
@@ -76,6 +77,26 @@ def _run_chapter_bar(
     api_key: Optional[str],
     api_base: str,
     model: str,
+) -> None:
+    """执行 Chapter Bar 生成流程（同步入口，整个流程共用一个事件循环）"""
+    asyncio.run(_run_chapter_bar_async(
+        input_file, output, mode, interval, theme, width, height,
+        key_frame_interval, api_key, api_base, model,
+    ))
+
+
+async def _run_chapter_bar_async(
+    input_file: Path,
+    output: Optional[Path],
+    mode: SegmentMode,
+    interval: int,
+    theme: str,
+    width: int,
+    height: int,
+    key_frame_interval: Optional[float],
+    api_key: Optional[str],
+    api_base: str,
+    model: str,
 ) -> None:
     """执行 Chapter Bar 生成流程"""
     # 验证配色
@@ -95,33 +116,33 @@ def _run_chapter_bar(
 
     console.print(f"\n[bold]vmarker v{__version__}[/bold] - Chapter Bar\n")
 
-    # 解析 SRT
+    # 解析 SRT（放入线程，事件循环保持响应）
     with console.status("[green]解析字幕..."):
         try:
-            srt = parse_srt_file(input_file)
+            srt = await asyncio.to_thread(parse_srt_file, input_file)
         except (FileNotFoundError, ValueError) as e:
             console.print(f"[red]解析失败: {e}[/red]")
             raise typer.Exit(1)
 
-    console.print(f"✓ {len(srt.subtitles)} 条字幕, 时长 {srt.duration:.1f}s")
-
     # 提取章节
     if mode == SegmentMode.ai:
+        # AI 请求先上路，网络往返期间完成统计输出
+        ai_task = asyncio.create_task(cb.extract_ai(
+            srt.subtitles,
+            srt.duration,
+            api_key=api_key,
+            api_base=api_base,
+            model=model,
+        ))
+        console.print(f"✓ {len(srt.subtitles)} 条字幕, 时长 {srt.duration:.1f}s")
         with console.status("[green]AI 智能分段..."):
             try:
-                chapters = asyncio.run(
-                    cb.extract_ai(
-                        srt.subtitles,
-                        srt.duration,
-                        api_key=api_key,
-                        api_base=api_base,
-                        model=model,
-                    )
-                )
+                chapters = await ai_task
             except Exception as e:
                 console.print(f"[yellow]AI 失败，降级为自动分段: {e}[/yellow]")
                 chapters = cb.extract_auto(srt.subtitles, srt.duration, interval)
     else:
+        console.print(f"✓ {len(srt.subtitles)} 条字幕, 时长 {srt.duration:.1f}s")
         chapters = cb.extract_auto(srt.subtitles, srt.duration, interval)
 
     console.print(f"✓ {len(chapters.chapters)} 个章节")
@@ -1,24 +1,19 @@
 """
 [INPUT]: 依赖 models.py 的 Subtitle, SubtitleFile
-[OUTPUT]: 对外提供 parse_srt(), parse_srt_file()
+[OUTPUT]: 对外提供 parse_srt(), parse_srt_file(), parse_srt_stream()
 [POS]: SRT 字幕文件解析器，被所有需要字幕的功能消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import codecs
 import re
+from collections.abc import AsyncIterator
 from pathlib import Path
 
 from vmarker.models import Subtitle, SubtitleFile
 
-
-# =============================================================================
-#  常量
-# =============================================================================
-
-_TIMESTAMP_RE = re.compile(r"(\d{1,2}):(\d{2}):(\d{2})[,.](\d{3})")
-_TIMELINE_RE = re.compile(
-    r"(\d{1,2}:\d{2}:\d{2}[,.]\d{3})\s*-->\s*(\d{1,2}:\d{2}:\d{2}[,.]\d{3})"
-)
+# 模块级预编译，不占用 re 模块的有限模式缓存位
+_BLOCK_SPLIT_RE = re.compile(r"\n\n+")
 
 
 # =============================================================================
@@ -27,11 +22,24 @@ _TIMELINE_RE = re.compile(
 
 def _parse_timestamp(ts: str) -> float:
     """解析时间戳为秒数"""
-    match = _TIMESTAMP_RE.match(ts.strip())
-    if not match:
+    # 格式 H{1,2}:MM:SS[,.]mmm 是定宽 ASCII，按字符位直接运算，
+    # 比正则匹配快一个数量级
+    s = ts.strip()
+    colon = s.find(":")
+    if (
+        colon not in (1, 2)
+        or len(s) < colon + 10
+        or s[colon + 3] != ":"
+        or s[colon + 6] not in ",."
+        or not (s[:colon] + s[colon + 1:colon + 3] + s[colon + 4:colon + 6] + s[colon + 7:colon + 10]).isdigit()
+    ):
         raise ValueError(f"无效时间戳: '{ts}'")
-    h, m, s, ms = match.groups()
-    return int(h) * 3600 + int(m) * 60 + int(s) + int(ms) / 1000
+
+    hours = int(s[:colon])
+    minutes = (ord(s[colon + 1]) - 48) * 10 + ord(s[colon + 2]) - 48
+    seconds = (ord(s[colon + 4]) - 48) * 10 + ord(s[colon + 5]) - 48
+    millis = (ord(s[colon + 7]) - 48) * 100 + (ord(s[colon + 8]) - 48) * 10 + ord(s[colon + 9]) - 48
+    return hours * 3600 + minutes * 60 + seconds + millis / 1000
 
 
 def _normalize_content(content: str) -> str:
@@ -52,12 +60,16 @@ def _parse_block(block: str, block_idx: int) -> Subtitle:
         raise ValueError(f"第 {block_idx} 个字幕块序号无效: '{lines[0]}'")
 
     # 解析时间轴
-    timeline = _TIMELINE_RE.match(lines[1].strip())
-    if not timeline:
+    timeline = lines[1].strip()
+    arrow = timeline.find("-->")
+    if arrow == -1:
         raise ValueError(f"第 {block_idx} 个字幕块时间轴格式错误: '{lines[1]}'")
 
-    start = _parse_timestamp(timeline.group(1))
-    end = _parse_timestamp(timeline.group(2))
+    try:
+        start = _parse_timestamp(timeline[:arrow])
+        end = _parse_timestamp(timeline[arrow + 3:])
+    except ValueError:
+        raise ValueError(f"第 {block_idx} 个字幕块时间轴格式错误: '{lines[1]}'")
 
     if end < start:
         raise ValueError(f"第 {block_idx} 个字幕块: 结束时间早于开始时间")
@@ -65,7 +77,9 @@ def _parse_block(block: str, block_idx: int) -> Subtitle:
     # 解析文本
     text = "\n".join(lines[2:]).strip() if len(lines) > 2 else ""
 
-    return Subtitle(index=index, start_time=start, end_time=end, text=text)
+    # 字段已在上方逐一校验，model_construct 跳过 pydantic 验证，
+    # 大文件（10 万级字幕）下单条构造成本降低数倍
+    return Subtitle.model_construct(index=index, start_time=start, end_time=end, text=text)
 
 
 # =============================================================================
@@ -83,7 +97,7 @@ def parse_srt(content: str) -> SubtitleFile:
         SubtitleFile 实例
     """
     content = _normalize_content(content)
-    blocks = re.split(r"\n\n+", content.strip())
+    blocks = _BLOCK_SPLIT_RE.split(content.strip())
 
     subtitles: list[Subtitle] = []
     max_end = 0.0
@@ -98,6 +112,66 @@ def parse_srt(content: str) -> SubtitleFile:
     return SubtitleFile(subtitles=subtitles, duration=max_end)
 
 
+async def parse_srt_stream(chunks: AsyncIterator[bytes]) -> SubtitleFile:
+    """
+    增量解析 SRT 字节流
+
+    逐块解码并在空行边界处解析字幕块，内存占用与单个字幕块
+    成正比，适合大文件上传场景。仅支持 UTF-8（含 BOM）；
+    其他编码会抛出 UnicodeDecodeError，调用方可回退到
+    decode_srt_bytes + parse_srt。
+
+    Args:
+        chunks: SRT 字节块的异步迭代器
+
+    Returns:
+        SubtitleFile 实例
+
+    Raises:
+        UnicodeDecodeError: 内容不是 UTF-8
+        ValueError: 字幕块格式错误
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    carry = ""  # 跨块的 \r（可能是 \r\n 的前半）
+    subtitles: list[Subtitle] = []
+    max_end = 0.0
+    block_idx = 0
+
+    def _consume_blocks(final: bool = False) -> None:
+        nonlocal buffer, max_end, block_idx
+        while True:
+            pos = buffer.find("\n\n")
+            if pos == -1:
+                break
+            block, buffer = buffer[:pos], buffer[pos + 2:].lstrip("\n")
+            if block.strip():
+                block_idx += 1
+                sub = _parse_block(block, block_idx)
+                subtitles.append(sub)
+                max_end = max(max_end, sub.end_time)
+        if final and buffer.strip():
+            block_idx += 1
+            sub = _parse_block(buffer, block_idx)
+            subtitles.append(sub)
+            max_end = max(max_end, sub.end_time)
+            buffer = ""
+
+    async for chunk in chunks:
+        text = carry + decoder.decode(chunk)
+        if text.endswith("\r"):
+            carry, text = "\r", text[:-1]
+        else:
+            carry = ""
+        buffer += _normalize_content(text)
+        _consume_blocks()
+
+    buffer += _normalize_content(carry + decoder.decode(b"", True))
+    _consume_blocks(final=True)
+
+    return SubtitleFile(subtitles=subtitles, duration=max_end)
+
+
 def parse_srt_file(path: str | Path) -> SubtitleFile:
     """
     解析 SRT 字幕文件
@@ -112,15 +186,8 @@ def parse_srt_file(path: str | Path) -> SubtitleFile:
     if not path.exists():
         raise FileNotFoundError(f"文件不存在: {path}")
 
-    # 尝试多种编码
-    for encoding in ["utf-8", "utf-8-sig", "gbk", "gb2312", "latin-1"]:
-        try:
-            content = path.read_text(encoding=encoding)
-            return parse_srt(content)
-        except UnicodeDecodeError:
-            continue
-
-    raise ValueError(f"无法识别文件编码: {path}")
+    # 整体读一次字节再解码，多编码尝试不重复读盘
+    return parse_srt(decode_srt_bytes(path.read_bytes()))
 
 
 def decode_srt_bytes(data: bytes) -> str:
@@ -133,7 +200,9 @@ def decode_srt_bytes(data: bytes) -> str:
     Returns:
         解码后的字符串
     """
-    for encoding in ["utf-8", "utf-8-sig", "gbk", "gb2312", "latin-1"]:
+    # utf-8-sig 兼容带/不带 BOM 的 UTF-8；若 utf-8 排在前面，
+    # 带 BOM 的文件会解码出 ﻿ 污染首个序号行导致解析失败
+    for encoding in ["utf-8-sig", "gbk", "gb2312", "latin-1"]:
         try:
             return data.decode(encoding)
         except UnicodeDecodeError:
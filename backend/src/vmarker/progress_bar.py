@@ -9,9 +9,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Callable
 
-from PIL import Image, ImageDraw
+from PIL import Image
 
-from vmarker.video_encoder import VideoEncoder
+from vmarker.video_encoder import VideoEncoder, hex_to_rgba
 
 
 # =============================================================================
@@ -50,34 +50,40 @@ DEFAULT_COLORS = {
 #  核心函数
 # =============================================================================
 
-def _render_frame(
+def _make_frame_renderer(
     config: ProgressBarConfig,
-    current_time: float,
-) -> Image.Image:
-    """渲染单帧进度条"""
-    progress = current_time / config.duration if config.duration > 0 else 0
-    progress = min(1.0, max(0.0, progress))
-
-    img = Image.new("RGBA", (config.width, config.height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
-
-    # 计算已播放区域宽度
-    played_width = int(config.width * progress)
-
-    # 绘制未播放区域（整个背景）
-    draw.rectangle(
-        [0, 0, config.width, config.height],
-        fill=config.unplayed_color,
-    )
+    played: tuple[int, int, int, int],
+    unplayed: tuple[int, int, int, int],
+    mode: str = "RGBA",
+) -> Callable[[float], Image.Image]:
+    """
+    构造增量帧渲染闭包
+
+    编码循环按时间递增调用，帧间只有进度边界右移了若干列。
+    复用同一块画布，每帧只把 [上次边界:新边界] 覆盖为已播放色，
+    写入量从整帧降到 O(Δ像素)。
+    """
+    w, h = config.width, config.height
+    img = Image.new(mode, (w, h), unplayed)
+    prev_pw = 0
+
+    def render(current_time: float) -> Image.Image:
+        nonlocal prev_pw
+        progress = current_time / config.duration if config.duration > 0 else 0
+        progress = min(1.0, max(0.0, progress))
+        # 原实现 rectangle([0, 0, pw, h]) 的右边界列含在填充内，
+        # paste 盒为右开区间，+1 保持逐帧像素输出与原版一致
+        pw = min(w, int(w * progress) + 1)
 
-    # 绘制已播放区域
-    if played_width > 0:
-        draw.rectangle(
-            [0, 0, played_width, config.height],
-            fill=config.played_color,
-        )
+        if pw > prev_pw:
+            img.paste(played, (prev_pw, 0, pw, h))
+        elif pw < prev_pw:
+            # 非单调调用（理论上不出现）：回退区域重置为未播放色
+            img.paste(unplayed, (pw, 0, prev_pw, h))
+        prev_pw = pw
+        return img
 
-    return img
+    return render
 
 
 def generate(
@@ -87,6 +93,7 @@ def generate(
     progress_callback: ProgressCallback | None = None,
     format: str = "mp4",
     key_frame_interval: float | None = None,
+    gop_seconds: float | None = None,
 ) -> Path:
     """
     生成进度条视频
@@ -97,6 +104,7 @@ def generate(
         progress_callback: 进度回调
         format: 输出格式（mp4/mov）
         key_frame_interval: 关键帧间隔（秒），设置后只渲染关键帧并用 FFmpeg 补帧
+        gop_seconds: 固定 GOP 间隔（秒），仅 mp4 有效，供分片合成按关键帧定位
 
     Returns:
         输出文件路径
@@ -107,8 +115,12 @@ def generate(
     # 直接传参数，不用 VideoConfig（因为 VideoConfig 的 height 约束是 >= 20）
     encoder = VideoEncoder(config.width, config.height, fps)
 
-    def render_frame(current_time: float) -> Image.Image:
-        return _render_frame(config, current_time)
+    # 颜色只换算一次，逐帧路径不再解析十六进制字符串
+    played = hex_to_rgba(config.played_color)
+    unplayed = hex_to_rgba(config.unplayed_color)
+    # mp4 最终丢弃透明度，RGB 画布省去 1/4 的逐帧字节量
+    mode = "RGB" if format == "mp4" else "RGBA"
+    render_frame = _make_frame_renderer(config, played, unplayed, mode)
 
     # 内部进度回调转换
     def internal_callback(frame: int, total: int) -> None:
@@ -123,6 +135,7 @@ def generate(
         progress_callback=internal_callback,
         format=format,
         key_frame_interval=key_frame_interval,
+        gop_seconds=gop_seconds,
     )
 
     if progress_callback:
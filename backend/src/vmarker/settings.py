@@ -0,0 +1,77 @@
+"""
+[INPUT]: 依赖 os, dataclasses, pathlib
+[OUTPUT]: 对外提供 Settings, load_settings(), load_env(), SETTINGS
+[POS]: 环境配置单例，启动时读取一次，替代路由内逐请求的 os.getenv
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import os
+from dataclasses import dataclass
+from pathlib import Path
+
+# =============================================================================
+#  .env 加载
+# =============================================================================
+
+# backend/.env（相对于包位置解析一次）
+DEFAULT_ENV_PATH = Path(__file__).resolve().parent.parent.parent / ".env"
+
+
+def load_env(path: Path | None = None) -> None:
+    """
+    加载 .env 文件到环境变量（已存在的变量不覆盖）
+
+    项目的 .env 只有 KEY=VALUE 行，无需 python-dotenv 的
+    完整解析器；每次 worker 启动都省去一次包导入与全量解析。
+    """
+    # 开发模式命中 backend/.env；安装模式下该路径指向 site-packages，
+    # 回退到当前目录的 .env（对齐原 load_dotenv 从 cwd 查找的行为）
+    if path is None:
+        path = DEFAULT_ENV_PATH if DEFAULT_ENV_PATH.exists() else Path(".env")
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        os.environ.setdefault(key.strip(), value.strip().strip("'\""))
+
+
+# =============================================================================
+#  配置模型
+# =============================================================================
+
+@dataclass(frozen=True)
+class Settings:
+    """环境配置（导入时冻结）"""
+    api_key: str
+    api_base: str
+    api_model: str
+    asr_api_base: str
+    asr_model: str
+
+
+def load_settings() -> Settings:
+    """
+    从环境变量读取配置
+
+    本模块导入时已先执行 load_env()，.env 的值此时可见。
+    """
+    api_base = os.getenv("API_BASE", "https://api.openai.com/v1")
+    return Settings(
+        api_key=os.getenv("API_KEY", ""),
+        api_base=api_base,
+        api_model=os.getenv("API_MODEL", "gpt-4o-mini"),
+        asr_api_base=os.getenv("ASR_API_BASE", api_base),
+        asr_model=os.getenv("ASR_MODEL", "whisper-1"),
+    )
+
+
+load_env()
+SETTINGS = load_settings()
@@ -7,7 +7,7 @@
 
 from dataclasses import dataclass
 
-from vmarker.ai_client import AIClient, AIConfig
+from vmarker.ai_client import AIConfig, get_client
 from vmarker.models import Subtitle
 
 
@@ -99,8 +99,7 @@ async def generate_shownotes(
 
     config = AIConfig(api_key=api_key, api_base=api_base, model=model)
 
-    async with AIClient(config) as client:
-        result = await client.chat_json(prompt)
+    result = await get_client(config).chat_json(prompt)
 
     # 解析结果
     summary = result.get("summary", "")
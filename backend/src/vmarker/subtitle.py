@@ -7,7 +7,7 @@
 
 from dataclasses import dataclass
 
-from vmarker.ai_client import AIClient, AIConfig
+from vmarker.ai_client import AIConfig, get_client
 from vmarker.models import Subtitle
 
 
@@ -116,15 +116,16 @@ async def polish_subtitles(
     all_polished: list[PolishedSubtitle] = []
     changes_count = 0
 
+    # 客户端共享，批次间复用同一连接池
+    config = AIConfig(api_key=api_key, api_base=api_base, model=model)
+    client = get_client(config)
+
     for i in range(0, len(subtitles), batch_size):
         batch = subtitles[i:i + batch_size]
         formatted = _format_subtitles_for_polish(batch)
         prompt = _POLISH_PROMPT.format(subtitles=formatted)
 
-        config = AIConfig(api_key=api_key, api_base=api_base, model=model)
-
-        async with AIClient(config) as client:
-            result = await client.chat_json(prompt)
+        result = await client.chat_json(prompt)
 
         # 解析结果，建立索引映射
         polished_map = {
@@ -65,6 +65,21 @@ class TempSession:
         path.write_bytes(content)
         return path
 
+    def open_upload(self, filename: str) -> Path:
+        """
+        获取上传文件的目标路径（供调用方流式写入）
+
+        与 save_upload 不同，不要求内容一次性在内存中，
+        适合大文件分块写入。
+
+        Args:
+            filename: 文件名
+
+        Returns:
+            目标文件路径
+        """
+        return self.session_dir / filename
+
     def save_text(self, filename: str, content: str, encoding: str = "utf-8") -> Path:
         """
         保存文本文件
@@ -10,7 +10,7 @@ from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
 
-from vmarker.video_probe import probe
+from vmarker.video_probe import VideoInfo, probe
 
 
 # =============================================================================
@@ -31,6 +31,7 @@ class CompositionConfig:
 
     position: OverlayPosition = OverlayPosition.BOTTOM
     output_format: str = "mp4"  # mp4 或 mov
+    source_info: VideoInfo | None = None  # 已探测的源视频信息，传入则跳过重复探测
 
 
 # =============================================================================
@@ -72,7 +73,7 @@ def compose_vstack(
         raise FileNotFoundError(f"Bar 视频不存在: {bar_video}")
 
     config = config or CompositionConfig()
-    source_info = probe(source_video)
+    source_info = config.source_info or probe(source_video)
 
     # 构建 filter_complex
     # 1. 将 bar 缩放到源视频宽度
@@ -1,6 +1,6 @@
 """
 [INPUT]: 依赖 subprocess, asyncio, pathlib, video_probe, video_composer, os
-[OUTPUT]: 对外提供 ParallelConfig, compose_vstack_parallel()
+[OUTPUT]: 对外提供 ParallelConfig, prepare_segments(), compose_vstack_parallel()
 [POS]: 并行视频合成模块，将长视频分片并行处理后再拼接
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
@@ -13,8 +13,14 @@ from dataclasses import field as dc_field
 from enum import Enum
 from pathlib import Path
 
-from vmarker.video_probe import probe
+from vmarker.video_probe import VideoInfo, probe
 from vmarker.video_composer import OverlayPosition
+from vmarker.video_encoder import (
+    available_cores,
+    detect_hw_encoder,
+    encoder_session_limit,
+    h264_encode_args,
+)
 
 
 # =============================================================================
@@ -45,12 +51,30 @@ def _parse_int_env(key: str, default: int) -> int:
         return default
 
 
+def _auto_max_workers() -> int:
+    """按编码器推导分片并发：硬件看会话上限，软件按核数/线程数折算"""
+    return max(1, min(encoder_session_limit(detect_hw_encoder()), available_cores()))
+
+
+def _parse_opt_int_env(key: str) -> int | None:
+    """解析可选整数环境变量，未设置或非法时返回 None"""
+    value = os.getenv(key)
+    if value is None:
+        return None
+    try:
+        parsed = int(value)
+    except ValueError:
+        return None
+    return parsed if parsed > 0 else None
+
+
 # =============================================================================
 #  环境变量配置
 # =============================================================================
 
 DEFAULT_CHUNK_SECONDS = _parse_int_env("COMPOSE_CHUNK_SECONDS", 300)  # 默认 5 分钟
-DEFAULT_MAX_WORKERS = _parse_int_env("COMPOSE_MAX_WORKERS", 2)  # 分片并发上限
+# 分片并发上限；未设置时按编码器自动推导
+DEFAULT_MAX_WORKERS: int | None = _parse_opt_int_env("COMPOSE_MAX_WORKERS")
 DEFAULT_MAX_ACTIVE_JOBS = _parse_int_env("COMPOSE_MAX_ACTIVE_JOBS", 2)  # 全局并发上限
 
 _ACTIVE_JOB_SEMAPHORE = asyncio.Semaphore(DEFAULT_MAX_ACTIVE_JOBS)
@@ -85,14 +109,27 @@ class ParallelConfig:
     """并行合成配置"""
     position: OverlayPosition = OverlayPosition.BOTTOM
     chunk_seconds: int = DEFAULT_CHUNK_SECONDS
-    max_workers: int = DEFAULT_MAX_WORKERS
+    max_workers: int | None = DEFAULT_MAX_WORKERS  # None = 按编码器自动推导
     gop_multiplier: int = 2  # GOP = fps * gop_multiplier
 
     def __post_init__(self):
         if self.chunk_seconds <= 0:
             raise ValueError(f"chunk_seconds must be positive, got {self.chunk_seconds}")
+        if self.max_workers is None:
+            self.max_workers = _auto_max_workers()
         if self.max_workers <= 0:
             raise ValueError(f"max_workers must be positive, got {self.max_workers}")
+        # FFmpeg 自身多线程编码，分片并发超过核数只会互相争抢 CPU，
+        # 拉低单片吞吐；显式指定给多大都压到可用核数以内
+        self.max_workers = min(self.max_workers, available_cores())
+
+
+@dataclass(frozen=True, slots=True)
+class EncodeSpec:
+    """分片编码参数（只读，全部分片共享一份，逐片不再重建）"""
+    filter_complex: str
+    encoder_args: tuple[str, ...]
+    input_hwaccel: tuple[str, ...] = ()
 
 
 @dataclass
@@ -129,99 +166,181 @@ def calculate_segments(duration: float, chunk_seconds: int) -> list[Segment]:
     if chunk_seconds <= 0:
         raise ValueError(f"chunk_seconds must be positive, got {chunk_seconds}")
 
+    # 以整毫秒累加：浮点累加的尾数噪声会让分片起点漂移，
+    # 拼接时 PTS 出现缝隙就得降级重编码
+    duration_ms = int(round(duration * 1000))
+    chunk_ms = chunk_seconds * 1000
+
     segments: list[Segment] = []
     index = 0
-    start = 0.0
+    start_ms = 0
 
-    while start < duration:
+    while start_ms < duration_ms:
         # 计算当前分片的时长（最后一片可能不足 chunk_seconds）
-        remaining = duration - start
-        segment_duration = min(chunk_seconds, remaining)
+        segment_ms = min(chunk_ms, duration_ms - start_ms)
 
         segments.append(Segment(
             index=index,
-            start=start,
-            duration=segment_duration,
+            start=start_ms / 1000,
+            duration=segment_ms / 1000,
         ))
 
-        start += segment_duration
+        start_ms += segment_ms
         index += 1
 
     return segments
 
 
+def prepare_segments(
+    source_video: Path,
+    config: ParallelConfig,
+) -> tuple[VideoInfo, list[Segment]]:
+    """
+    探测源视频并计算分片
+
+    只依赖源视频元数据，可与 Bar 生成等前置步骤并行执行。
+
+    Args:
+        source_video: 源视频路径
+        config: 并行配置
+
+    Returns:
+        (源视频信息, 分片列表)
+
+    Raises:
+        RuntimeError: 视频时长无效
+    """
+    source_info = probe(source_video)
+    if source_info.duration <= 0:
+        raise RuntimeError(f"无效视频时长: {source_info.duration}")
+
+    segments = calculate_segments(source_info.duration, config.chunk_seconds)
+    return source_info, segments
+
+
+async def _warm_ffmpeg() -> None:
+    """预跑一次 ffmpeg -version，把二进制和编解码库提前页入页缓存"""
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-version",
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+            close_fds=False,
+        )
+        await process.wait()
+    except OSError:
+        pass  # ffmpeg 缺失时由真正的编码调用报错
+
+
+def _fmt_ts(seconds: float) -> str:
+    """时间参数格式化为整毫秒（FFmpeg 时长语法支持 ms 后缀）
+
+    str(float) 可能产出 0.30000000000000004 这类十进制噪声，
+    整毫秒表示让各分片的定位值精确可复现。
+    """
+    return f"{int(round(seconds * 1000))}ms"
+
+
+def _vstack_filter(position: OverlayPosition, width: int) -> str:
+    """构建 Bar 与源视频垂直堆叠的 filter_complex
+
+    shortest=1：任一路输入先结束即收尾，尾片上 Bar 与源时长的
+    毫秒级出入不会让滤镜空等最后一路。
+    """
+    if position == OverlayPosition.TOP:
+        return f"[1:v]scale={width}:-1[bar];[bar][0:v]vstack=inputs=2:shortest=1[out]"
+    return f"[1:v]scale={width}:-1[bar];[0:v][bar]vstack=inputs=2:shortest=1[out]"
+
+
+def _build_encode_spec(config: ParallelConfig, source_info: "VideoInfo") -> EncodeSpec:  # type: ignore
+    """构建分片共享的编码参数（滤镜串、GOP、编码器参数只算一次）"""
+    gop = int(source_info.fps * config.gop_multiplier)
+    encoder_args = (
+        # 视频编码：固定 GOP（硬件编码器可用时优先）。
+        # libx264 的多片并行已改走单次分段编码，本 spec 对 libx264
+        # 只剩单片整编一个消费方，不设 -threads 上限，放开全核
+        *h264_encode_args(gop=gop),
+        # 音频编码
+        "-c:a", "aac",
+        "-b:a", "128k",
+        # 重置时间戳（便于拼接）
+        "-reset_timestamps", "1",
+        "-fflags", "+genpts",  # 生成 PTS
+    )
+    # NVENC 在位时把解码也交给 NVDEC；vstack/scale 仍在 CPU
+    # （FFmpeg 没有 CUDA 版 pad/vstack，堆叠无法全程驻留显存），
+    # 但解码从 CPU 挪走后编码进程内不再互相抢核
+    hwaccel = ("-hwaccel", "cuda") if detect_hw_encoder() == "h264_nvenc" else ()
+    return EncodeSpec(
+        filter_complex=_vstack_filter(config.position, source_info.width),
+        encoder_args=encoder_args,
+        input_hwaccel=hwaccel,
+    )
+
+
 async def compose_segment(
     source_video: Path,
     bar_video: Path,
     segment: Segment,
     output_path: Path,
-    config: ParallelConfig,
-    source_info: "VideoInfo",  # type: ignore
+    spec: EncodeSpec,
 ) -> Path:
     """
     合成单个分片
 
-    使用固定 GOP 确保拼接时关键帧对齐。
+    编码参数由调用方经 EncodeSpec 一次性备好；固定 GOP 确保拼接时
+    关键帧对齐。
     """
-    # 计算 GOP（关键帧间隔）
-    gop = int(source_info.fps * config.gop_multiplier)
-
-    # 构建 filter_complex
-    if config.position == OverlayPosition.TOP:
-        filter_complex = (
-            f"[1:v]scale={source_info.width}:-1[bar];"
-            f"[bar][0:v]vstack=inputs=2[out]"
-        )
-    else:
-        filter_complex = (
-            f"[1:v]scale={source_info.width}:-1[bar];"
-            f"[0:v][bar]vstack=inputs=2[out]"
-        )
-
-    # 构建命令
     cmd = [
         "ffmpeg", "-y",
-        # 输入源视频（分片）
-        "-ss", str(segment.start),
-        "-t", str(segment.duration),
+        # 只留致命输出：x264 的逐帧进度文本可达数十 MB
+        "-nostats", "-loglevel", "error",
+        # 输入源视频（分片）：源 GOP 不受控，保持精确定位
+        *spec.input_hwaccel,
+        "-ss", _fmt_ts(segment.start),
         "-i", str(source_video),
-        # 输入 Bar 视频（分片）
-        "-ss", str(segment.start),
-        "-t", str(segment.duration),
+        # 输入 Bar 视频（分片）：Bar 以 gop_seconds=1 编码，整秒分片起点
+        # 必落关键帧，跳过解码丢帧直接索引定位
+        *spec.input_hwaccel,
+        "-ss", _fmt_ts(segment.start),
+        "-noaccurate_seek",
         "-i", str(bar_video),
         # 滤镜
-        "-filter_complex", filter_complex,
+        "-filter_complex", spec.filter_complex,
         "-map", "[out]",
         "-map", "0:a?",  # 保留音频（如果有）
-        # 视频编码：固定 GOP
-        "-c:v", "libx264",
-        "-crf", "18",
-        "-preset", "fast",
-        "-g", str(gop),
-        "-keyint_min", str(gop),
-        "-sc_threshold", "0",  # 禁用场景切换检测
-        # 音频编码
-        "-c:a", "aac",
-        "-b:a", "128k",
-        # 重置时间戳（便于拼接）
-        "-reset_timestamps", "1",
-        "-fflags", "+genpts",  # 生成 PTS
+        # 分片时长（输出侧截断，两路输入只截一次）
+        "-t", _fmt_ts(segment.duration),
+        *spec.encoder_args,
         # 输出
         str(output_path),
     ]
 
-    # 运行 FFmpeg
-    process = await asyncio.create_subprocess_exec(
-        *cmd,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-
-    _, stderr = await process.communicate()
+    # stderr 落文件而非管道：管道缓冲写满会反压编码器，
+    # communicate() 还要为每个管道起后台读任务
+    stderr_path = output_path.with_suffix(".err")
+    with open(stderr_path, "wb") as stderr_file:
+        # close_fds=False 走 posix_spawn 快路径，免去逐 fd 关闭开销
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=stderr_file,
+            close_fds=False,
+        )
+        try:
+            await process.wait()
+        except asyncio.CancelledError:
+            # 任务被取消时同步终止 FFmpeg，把编码器真正还回来
+            process.terminate()
+            await process.wait()
+            raise
 
-    if process.returncode != 0:
-        error_msg = stderr.decode("utf-8", errors="ignore")[-500:]  # 最后 500 字符
-        raise RuntimeError(f"FFmpeg 分片合成失败: {error_msg}")
+    try:
+        if process.returncode != 0:
+            error_msg = stderr_path.read_bytes()[-500:].decode("utf-8", errors="ignore")
+            raise RuntimeError(f"FFmpeg 分片合成失败: {error_msg}")
+    finally:
+        stderr_path.unlink(missing_ok=True)
 
     return output_path
 
@@ -248,7 +367,12 @@ async def compose_segments_parallel(
     Returns:
         输出文件路径列表（按索引排序）
     """
-    semaphore = asyncio.Semaphore(config.max_workers)
+    # 并发上限同时受编码器会话数约束（NVENC/AMF 的会话是芯片资源）
+    workers = min(config.max_workers, encoder_session_limit(detect_hw_encoder()))
+    semaphore = asyncio.Semaphore(workers)
+
+    # 编码参数全分片相同，备好一份共享
+    spec = _build_encode_spec(config, source_info)
 
     async def process_segment(seg: Segment) -> tuple[int, Path]:
         """处理单个分片（带并发控制）"""
@@ -258,7 +382,7 @@ async def compose_segments_parallel(
 
             try:
                 result = await compose_segment(
-                    source_video, bar_video, seg, output_path, config, source_info
+                    source_video, bar_video, seg, output_path, spec
                 )
                 seg.status = JobStatus.DONE
                 seg.output_path = result
@@ -268,22 +392,109 @@ async def compose_segments_parallel(
                 seg.error = str(e)
                 raise
 
-    # 并行处理所有分片
-    tasks = [process_segment(seg) for seg in segments]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-
-    # 收集成功的输出
+    # 并行处理所有分片，按完成顺序消费结果：
+    # 首个失败立即取消剩余分片，不再等所有任务跑完才发现问题
+    tasks = [asyncio.ensure_future(process_segment(seg)) for seg in segments]
     outputs: dict[int, Path] = {}
-    for result in results:
-        if isinstance(result, Exception):
-            continue
-        index, path = result
-        outputs[index] = path
+
+    try:
+        for fut in asyncio.as_completed(tasks):
+            index, path = await fut
+            outputs[index] = path
+    except Exception:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
     # 按索引排序返回
     return [outputs[i] for i in range(len(segments)) if i in outputs]
 
 
+async def compose_segments_single_pass(
+    source_video: Path,
+    bar_video: Path,
+    segments: list[Segment],
+    output_dir: Path,
+    config: ParallelConfig,
+    source_info: "VideoInfo",  # type: ignore
+) -> list[Path]:
+    """
+    单次 FFmpeg 调用产出所有分片（segment muxer）
+
+    软件编码时 x264 自带多线程，逐片开进程只是重复付出输入探测、
+    编码器初始化和 N-1 次源视频解复用的成本；用 -f segment 一次
+    编码直接切片，把这些固定开销摊到整个视频上。
+
+    Args:
+        参数与 compose_segments_parallel 一致
+
+    Returns:
+        输出文件路径列表（按索引排序）
+    """
+    gop = int(source_info.fps * config.gop_multiplier)
+    filter_complex = _vstack_filter(config.position, source_info.width)
+
+    for seg in segments:
+        seg.status = JobStatus.RUNNING
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-nostats", "-loglevel", "error",
+        "-i", str(source_video),
+        "-i", str(bar_video),
+        "-filter_complex", filter_complex,
+        "-map", "[out]",
+        "-map", "0:a?",
+        # 固定 GOP：关键帧落在分片边界，segment muxer 才能精确切割
+        *h264_encode_args(gop=gop),
+        "-c:a", "aac",
+        "-b:a", "128k",
+        "-f", "segment",
+        "-segment_time", str(config.chunk_seconds),
+        "-reset_timestamps", "1",
+        "-segment_format", "mp4",
+        str(output_dir / "segment_%04d.mp4"),
+    ]
+
+    # stderr 落文件，理由同 compose_segment
+    stderr_path = output_dir / "segments.err"
+    with open(stderr_path, "wb") as stderr_file:
+        process = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=stderr_file,
+            close_fds=False,
+        )
+        try:
+            await process.wait()
+        except asyncio.CancelledError:
+            process.terminate()
+            await process.wait()
+            raise
+
+    try:
+        if process.returncode != 0:
+            for seg in segments:
+                seg.status = JobStatus.FAILED
+            error_msg = stderr_path.read_bytes()[-500:].decode("utf-8", errors="ignore")
+            raise RuntimeError(f"FFmpeg 分片合成失败: {error_msg}")
+    finally:
+        stderr_path.unlink(missing_ok=True)
+
+    outputs: list[Path] = []
+    for seg in segments:
+        path = output_dir / f"segment_{seg.index:04d}.mp4"
+        if path.exists():
+            seg.status = JobStatus.DONE
+            seg.output_path = path
+            outputs.append(path)
+        else:
+            seg.status = JobStatus.FAILED
+            seg.error = f"分片文件缺失: {path.name}"
+    return outputs
+
+
 async def concat_segments(
     segment_paths: list[Path],
     output_path: Path,
@@ -303,30 +514,34 @@ async def concat_segments(
     if not segment_paths:
         raise RuntimeError("没有可拼接的分片")
 
-    # 生成 concat 列表文件
-    concat_file = output_path.parent / "segments.txt"
-    with open(concat_file, "w") as f:
-        for path in segment_paths:
-            # 转义路径中的特殊字符
-            safe_path = str(path).replace("'", r"\'")
-            f.write(f"file '{safe_path}'\n")
+    # concat 列表经 stdin 直接送入，不落盘也无需事后清理
+    lines = []
+    for path in segment_paths:
+        # 转义路径中的特殊字符
+        safe_path = str(path).replace("'", r"\'")
+        lines.append(f"file '{safe_path}'\n")
+    list_data = "".join(lines).encode()
 
     # 先尝试无重编码拼接
     if not reencode:
         cmd = [
             "ffmpeg", "-y",
+            "-nostats", "-loglevel", "error",
             "-f", "concat",
             "-safe", "0",
-            "-i", str(concat_file),
+            "-protocol_whitelist", "file,pipe",
+            "-i", "pipe:0",
             "-c", "copy",
             str(output_path),
         ]
         process = await asyncio.create_subprocess_exec(
             *cmd,
+            stdin=asyncio.subprocess.PIPE,
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
+            close_fds=False,
         )
-        _, stderr = await process.communicate()
+        _, stderr = await process.communicate(input=list_data)
 
         if process.returncode == 0 and output_path.exists():
             return output_path
@@ -334,9 +549,11 @@ async def concat_segments(
     # 降级到重编码拼接
     cmd = [
         "ffmpeg", "-y",
+        "-nostats", "-loglevel", "error",
         "-f", "concat",
         "-safe", "0",
-        "-i", str(concat_file),
+        "-protocol_whitelist", "file,pipe",
+        "-i", "pipe:0",
         "-c:v", "libx264",
         "-crf", "18",
         "-preset", "fast",
@@ -346,10 +563,12 @@ async def concat_segments(
     ]
     process = await asyncio.create_subprocess_exec(
         *cmd,
+        stdin=asyncio.subprocess.PIPE,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
+        close_fds=False,
     )
-    _, stderr = await process.communicate()
+    _, stderr = await process.communicate(input=list_data)
 
     if process.returncode != 0:
         error_msg = stderr.decode("utf-8", errors="ignore")[-500:]
@@ -373,6 +592,7 @@ async def compose_vstack_parallel(
     bar_video: Path,
     output_path: Path,
     config: ParallelConfig | None = None,
+    prepared: tuple[VideoInfo, list[Segment]] | None = None,
 ) -> Path:
     """
     并行合成视频（垂直堆叠 Bar）
@@ -388,6 +608,7 @@ async def compose_vstack_parallel(
         bar_video: Bar 视频路径
         output_path: 输出路径
         config: 并行配置
+        prepared: 预先准备的 (源视频信息, 分片列表)，传入则跳过重复探测
 
     Returns:
         输出文件路径
@@ -403,29 +624,37 @@ async def compose_vstack_parallel(
 
     config = config or ParallelConfig()
     async with _ACTIVE_JOB_SEMAPHORE:
-        source_info = probe(source_video)
-        if source_info.duration <= 0:
-            raise RuntimeError(f"无效视频时长: {source_info.duration}")
+        # 预热 FFmpeg（页缓存命中后，后续每次 exec 免去冷加载）
+        await _warm_ffmpeg()
 
-        # 1. 计算分片
-        segments = calculate_segments(source_info.duration, config.chunk_seconds)
+        # 1. 计算分片（调用方可提前并行完成）
+        if prepared is None:
+            prepared = prepare_segments(source_video, config)
+        source_info, segments = prepared
 
-        # 如果只有一个分片，直接使用原有串行逻辑
+        # 如果只有一个分片，同一条分片命令直接产出最终文件：
+        # 免去串行模块的二次配置，也让单片共享编码器选择（含硬件编码）
         if len(segments) == 1:
-            from vmarker.video_composer import compose_vstack, CompositionConfig
-            serial_config = CompositionConfig(position=config.position)
-            return compose_vstack(source_video, bar_video, output_path, serial_config)
+            spec = _build_encode_spec(config, source_info)
+            return await compose_segment(
+                source_video, bar_video, segments[0], output_path, spec
+            )
 
         # 用于追踪需要清理的分片文件
         segment_outputs: list[Path] = []
         output_dir = output_path.parent
-        concat_file = output_dir / "segments.txt"
 
         try:
-            # 2. 并行合成分片
-            segment_outputs = await compose_segments_parallel(
-                source_video, bar_video, segments, output_dir, config, source_info
-            )
+            # 2. 合成分片：硬件编码器支持多并发会话，逐片并行能吃满；
+            # 软件编码 x264 自带多线程，单次调用 + segment muxer 更省
+            if detect_hw_encoder() == "libx264":
+                segment_outputs = await compose_segments_single_pass(
+                    source_video, bar_video, segments, output_dir, config, source_info
+                )
+            else:
+                segment_outputs = await compose_segments_parallel(
+                    source_video, bar_video, segments, output_dir, config, source_info
+                )
 
             if len(segment_outputs) != len(segments):
                 raise RuntimeError(f"部分分片合成失败: {len(segment_outputs)}/{len(segments)} 成功")
@@ -435,12 +664,6 @@ async def compose_vstack_parallel(
 
             return output_path
         finally:
-            # 4. 无论成功失败都清理临时分片
-            cleanup_segments(segment_outputs)
-
-            # 清理 concat 列表文件
-            try:
-                if concat_file.exists():
-                    concat_file.unlink()
-            except Exception:
-                pass
+            # 4. 无论成功失败都清理临时分片（含失败前已完成的分片）
+            done_paths = [seg.output_path for seg in segments if seg.output_path]
+            cleanup_segments(segment_outputs or done_paths)
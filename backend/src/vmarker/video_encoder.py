@@ -1,14 +1,17 @@
 """
 [INPUT]: 依赖 Pillow, subprocess (FFmpeg)
-[OUTPUT]: 对外提供 VideoEncoder, hex_to_rgba(), get_font()
+[OUTPUT]: 对外提供 VideoEncoder, hex_to_rgba(), get_font(), detect_hw_encoder(), h264_encode_args(), encoder_session_limit()
 [POS]: 视频编码工具，被 chapter_bar 和未来的 progress_bar 消费
 [PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
 """
 
+import os
+import queue
 import subprocess
 import tempfile
-from collections.abc import Callable, Iterator
-from contextlib import contextmanager
+import threading
+from collections.abc import Callable
+from functools import lru_cache
 from pathlib import Path
 
 from PIL import Image, ImageFont
@@ -26,13 +29,123 @@ FrameRenderer = Callable[[float], Image.Image]
 #  颜色工具
 # =============================================================================
 
+@lru_cache(maxsize=256)
 def hex_to_rgba(hex_color: str, alpha: int = 255) -> tuple[int, int, int, int]:
-    """十六进制颜色转 RGBA"""
-    hex_color = hex_color.lstrip("#")
-    r = int(hex_color[0:2], 16)
-    g = int(hex_color[2:4], 16)
-    b = int(hex_color[4:6], 16)
-    return (r, g, b, alpha)
+    """十六进制颜色转 RGBA（纯函数，重复颜色直接命中缓存）
+
+    整串解析一次再位移取分量，比三次切片 + 三次 int() 便宜。
+    """
+    value = int(hex_color.lstrip("#"), 16)
+    return ((value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF, alpha)
+
+
+# =============================================================================
+#  编码器探测
+# =============================================================================
+
+def _try_encoder(name: str) -> bool:
+    """单帧试编码验证编码器真实可用"""
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "color=black:s=64x64",
+                "-frames:v", "1", "-c:v", name, "-f", "null", "-",
+            ],
+            capture_output=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+@lru_cache(maxsize=1)
+def detect_hw_encoder() -> str:
+    """
+    探测可用的 H.264 硬件编码器
+
+    专用编码 ASIC 的吞吐是 x264 软件编码的数倍。按
+    NVENC > AMF > QSV 的优先级选择，都不可用则回退 libx264。
+    -encoders 只反映编译选项，无 GPU 的容器里同样会列出
+    h264_nvenc，因此命中名字后还要单帧试编码确认驱动真实可用。
+    结果进程内缓存，只探测一次。
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=10,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return "libx264"
+    if result.returncode != 0:
+        return "libx264"
+
+    for name in ("h264_nvenc", "h264_amf", "h264_qsv"):
+        if name in result.stdout and _try_encoder(name):
+            return name
+    return "libx264"
+
+
+# 软件编码逐片并行时单个 x264 进程的线程数
+X264_SEGMENT_THREADS = 4
+
+
+def available_cores() -> int:
+    """当前进程实际可调度的核数（容器限核时 cpu_count 会虚高）"""
+    try:
+        return len(os.sched_getaffinity(0)) or 1
+    except AttributeError:  # 非 Linux 平台没有 CPU 亲和性接口
+        return os.cpu_count() or 1
+
+
+@lru_cache(maxsize=8)
+def encoder_session_limit(encoder: str) -> int:
+    """
+    编码器的并发会话上限
+
+    硬件编码会话是芯片资源：消费级 NVENC 固件上限 3-8 路，
+    AMF/QSV 通常只有 1-2 个编码单元；超订会让 FFmpeg 排队甚至
+    直接报错。软件编码按核数除以单进程线程数折算。
+    """
+    if encoder == "h264_nvenc":
+        return 3  # 消费卡固件下限，专业卡不限但取保守值
+    if encoder in ("h264_amf", "h264_qsv"):
+        return 2
+    return max(1, available_cores() // X264_SEGMENT_THREADS)
+
+
+def h264_encode_args(gop: int | None = None) -> list[str]:
+    """
+    生成当前编码器的 H.264 参数
+
+    Args:
+        gop: 固定关键帧间隔（分片拼接需要对齐时传入）
+
+    Returns:
+        FFmpeg 参数列表
+    """
+    encoder = detect_hw_encoder()
+    if encoder == "h264_nvenc":
+        args = ["-c:v", "h264_nvenc", "-preset", "p4", "-rc", "vbr", "-cq", "19", "-b:v", "0"]
+        if gop is not None:
+            args += ["-g", str(gop), "-no-scenecut", "1"]
+    elif encoder == "h264_amf":
+        args = [
+            "-c:v", "h264_amf",
+            "-usage", "transcoding", "-quality", "balanced",
+            "-rc", "cqp", "-qp_i", "19", "-qp_p", "21",
+        ]
+        if gop is not None:
+            args += ["-g", str(gop)]
+    elif encoder == "h264_qsv":
+        args = ["-c:v", "h264_qsv", "-global_quality", "19", "-preset", "fast"]
+        if gop is not None:
+            args += ["-g", str(gop)]
+    else:
+        args = ["-c:v", "libx264", "-crf", "18", "-preset", "fast"]
+        if gop is not None:
+            args += ["-g", str(gop), "-keyint_min", str(gop), "-sc_threshold", "0"]
+    return args
 
 
 # =============================================================================
@@ -52,14 +165,28 @@ _FONT_PATHS = [
 ]
 
 
-def get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
-    """获取字体，优先使用系统中文字体"""
+@lru_cache(maxsize=1)
+def _resolved_font_path() -> str | None:
+    """定位首个可用的字体文件，全部字号共享这次探测"""
     for path in _FONT_PATHS:
         if Path(path).exists():
-            try:
-                return ImageFont.truetype(path, size)
-            except OSError:
-                continue
+            return path
+    return None
+
+
+@lru_cache(maxsize=64)
+def get_font(size: int) -> ImageFont.FreeTypeFont | ImageFont.ImageFont:
+    """获取字体，优先使用系统中文字体
+
+    路径只探测一次，每个字号只加载一次；加载后的 ImageFont 只读，
+    可跨调用方安全共享。
+    """
+    path = _resolved_font_path()
+    if path is not None:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            pass
     return ImageFont.load_default()
 
 
@@ -75,12 +202,6 @@ class VideoEncoder:
         self.height = height
         self.fps = fps
 
-    @contextmanager
-    def _temp_dir(self) -> Iterator[Path]:
-        """创建临时目录"""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            yield Path(tmpdir)
-
     def encode(
         self,
         duration: float,
@@ -90,10 +211,14 @@ class VideoEncoder:
         progress_callback: ProgressCallback | None = None,
         format: str = "webm",
         key_frame_interval: float | None = None,
+        gop_seconds: float | None = None,
     ) -> Path:
         """
         编码视频
 
+        帧以原始像素流经 stdin 直达 FFmpeg，不经 PNG 压缩/解压，
+        也不落盘中转。
+
         Args:
             duration: 视频时长（秒）
             render_frame: 帧渲染函数，接收当前时间，返回 PIL Image
@@ -101,6 +226,7 @@ class VideoEncoder:
             progress_callback: 进度回调
             format: 输出格式 ("webm" 或 "mov")
             key_frame_interval: 关键帧间隔（秒），设置后只渲染关键帧并用 FFmpeg 补帧
+            gop_seconds: 固定 GOP 间隔（秒），仅 mp4 有效；下游分片需按关键帧定位时传入
 
         Returns:
             输出文件路径
@@ -108,93 +234,79 @@ class VideoEncoder:
         total_frames = int(duration * self.fps)
         frame_step = self._key_frame_step(key_frame_interval)
 
-        with self._temp_dir() as tmpdir:
-            if frame_step > 1:
-                total_keyframes = (total_frames + frame_step - 1) // frame_step
-                keyframe_idx = 0
-                for frame_idx in range(0, total_frames, frame_step):
-                    current_time = frame_idx / self.fps
-                    img = render_frame(current_time)
-                    frame_path = tmpdir / f"frame_{keyframe_idx:06d}.png"
-                    img.save(frame_path, "PNG")
-
-                    if progress_callback:
-                        progress_callback(keyframe_idx + 1, total_keyframes)
-                    keyframe_idx += 1
-
-                filter_chain = f"fps={self.fps}"
-                input_fps = self.fps / frame_step
-                self._ffmpeg_encode(
-                    tmpdir,
-                    output_path,
-                    format,
-                    input_fps=input_fps,
-                    filter_arg=filter_chain,
-                )
-            else:
-                # 渲染所有帧
-                for frame_idx in range(total_frames):
-                    current_time = frame_idx / self.fps
-                    img = render_frame(current_time)
-                    frame_path = tmpdir / f"frame_{frame_idx:06d}.png"
-                    img.save(frame_path, "PNG")
-
-                    if progress_callback:
-                        progress_callback(frame_idx + 1, total_frames)
+        frame_indices = range(0, total_frames, frame_step)
+        total_outputs = len(frame_indices)
+        input_fps = self.fps / frame_step
 
-                # FFmpeg 合成
-                self._ffmpeg_encode(tmpdir, output_path, format)
+        # 首帧决定输入像素格式（渲染器画布为 RGB 或 RGBA）
+        first_img = render_frame(0.0)
+        pix_fmt = "rgb24" if first_img.mode == "RGB" else "rgba"
 
-        return output_path
-
-    def _ffmpeg_encode(
-        self,
-        frames_dir: Path,
-        output_path: Path,
-        format: str,
-        *,
-        input_fps: float | None = None,
-        filter_arg: str | None = None,
-    ) -> None:
-        """调用 FFmpeg 合成视频"""
-        input_fps = self.fps if input_fps is None else input_fps
+        cmd = [
+            "ffmpeg",
+            "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", pix_fmt,
+            "-s", f"{self.width}x{self.height}",
+            "-framerate", str(input_fps),
+            "-i", "pipe:0",
+        ]
+        if frame_step > 1:
+            cmd += ["-vf", f"fps={self.fps}"]
         if format == "mp4":
             # MP4 (H.264) - 通用格式，浏览器兼容，文件小
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-framerate", str(input_fps),
-                "-i", str(frames_dir / "frame_%06d.png"),
-            ]
-            if filter_arg:
-                cmd.extend(["-vf", filter_arg])
-            cmd += [
-                "-c:v", "libx264",
-                "-pix_fmt", "yuv420p",
-                "-crf", "18",
-                "-preset", "fast",
-                str(output_path),
-            ]
+            gop = int(self.fps * gop_seconds) if gop_seconds else None
+            cmd += [*h264_encode_args(gop=gop), "-pix_fmt", "yuv420p"]
         else:
             # MOV (PNG codec) - 透明背景，专业剪辑
-            cmd = [
-                "ffmpeg",
-                "-y",
-                "-framerate", str(input_fps),
-                "-i", str(frames_dir / "frame_%06d.png"),
-            ]
-            if filter_arg:
-                cmd.extend(["-vf", filter_arg])
-            cmd += [
-                "-c:v", "png",
-                "-pix_fmt", "rgba",
-                str(output_path),
-            ]
-
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            raise RuntimeError(f"FFmpeg 执行失败: {result.stderr}")
+            cmd += ["-c:v", "png", "-pix_fmt", "rgba"]
+        cmd.append(str(output_path))
+
+        # stderr 落临时文件：向 stdin 写帧时若用管道收 stderr，
+        # 双方缓冲区同时写满会互相等待死锁
+        with tempfile.TemporaryFile() as stderr_file:
+            proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=stderr_file)
+            assert proc.stdin is not None
+
+            # 渲染器带跨帧状态（增量画布），必须按时间顺序串行；
+            # 改用后台线程写 stdin，渲染第 N+1 帧时 FFmpeg 正消费第 N 帧。
+            # 有界队列限制在途帧数防内存膨胀
+            frames: queue.Queue[bytes | None] = queue.Queue(maxsize=max(8, self.fps))
+            write_error: list[OSError] = []
+
+            def _writer() -> None:
+                while (data := frames.get()) is not None:
+                    if write_error:
+                        continue  # 管道已断，持续清队避免渲染端阻塞
+                    try:
+                        proc.stdin.write(data)
+                    except OSError as e:
+                        write_error.append(e)
+
+            writer = threading.Thread(target=_writer, daemon=True)
+            writer.start()
+            try:
+                for out_idx, frame_idx in enumerate(frame_indices):
+                    img = first_img if out_idx == 0 else render_frame(frame_idx / self.fps)
+                    # tobytes 是快照，画布可继续原地更新
+                    frames.put(img.tobytes())
+                    if progress_callback:
+                        progress_callback(out_idx + 1, total_outputs)
+            finally:
+                frames.put(None)
+                writer.join()
+                try:
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass
+                proc.wait()
+
+            if proc.returncode != 0:
+                stderr_file.seek(0)
+                stderr = stderr_file.read().decode("utf-8", errors="ignore")
+                raise RuntimeError(f"FFmpeg 执行失败: {stderr}")
+
+        return output_path
 
     def _key_frame_step(self, key_frame_interval: float | None) -> int:
         if key_frame_interval is None:
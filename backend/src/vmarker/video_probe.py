@@ -8,6 +8,7 @@
 import json
 import subprocess
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 
 
@@ -16,9 +17,9 @@ from pathlib import Path
 # =============================================================================
 
 
-@dataclass
+@dataclass(frozen=True)
 class VideoInfo:
-    """视频元数据"""
+    """视频元数据（只读，可在缓存与并行任务间安全共享）"""
 
     duration: float  # 时长（秒）
     width: int  # 宽度
@@ -45,6 +46,9 @@ def probe(video_path: Path) -> VideoInfo:
     """
     探测视频元数据
 
+    结果按 (路径, mtime, 大小) 缓存：同一文件重复探测不再
+    fork FFprobe，文件被覆盖后键变化自动失效。
+
     Args:
         video_path: 视频文件路径
 
@@ -59,6 +63,13 @@ def probe(video_path: Path) -> VideoInfo:
     if not video_path.exists():
         raise FileNotFoundError(f"视频文件不存在: {video_path}")
 
+    stat = video_path.stat()
+    return _probe_cached(str(video_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _probe_cached(video_path: str, mtime_ns: int, size: int) -> VideoInfo:
+    """实际执行 FFprobe（参数含 mtime/size 仅作缓存键）"""
     cmd = [
         "ffprobe",
         "-v",
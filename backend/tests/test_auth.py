@@ -186,3 +186,46 @@ def test_auth_check_invalid_token(client):
     data = response.json()
     assert data["authenticated"] is False
     assert data["user"] is None
+
+
+# =============================================================================
+#  CORS 中间件测试
+# =============================================================================
+
+
+def test_cors_preflight_echoes_request_headers(client):
+    """预检回显请求头列表（* 通配不覆盖 Authorization）"""
+    response = client.options(
+        "/api/v1/auth/check",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "authorization, content-type",
+        },
+    )
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.headers["access-control-allow-headers"] == "authorization, content-type"
+
+
+def test_cors_preflight_without_request_headers(client):
+    """不带请求头列表的预检回退到通配"""
+    response = client.options(
+        "/api/v1/auth/check",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+
+    assert response.status_code == status.HTTP_204_NO_CONTENT
+    assert response.headers["access-control-allow-headers"] == "*"
+
+
+def test_cors_headers_on_regular_response(client):
+    """普通响应追加 CORS 头"""
+    response = client.get("/health", headers={"Origin": "http://localhost:3000"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.headers["access-control-allow-origin"] == "*"
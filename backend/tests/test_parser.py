@@ -7,7 +7,13 @@
 
 import pytest
 
-from vmarker.parser import parse_srt
+from vmarker.parser import parse_srt, parse_srt_stream
+
+
+async def _chunks(data: bytes, size: int):
+    """把字节串切成固定大小的异步块流"""
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
 
 
 class TestParseSrt:
@@ -110,3 +116,70 @@ invalid --> 00:00:02,866
         result = parse_srt(content)
 
         assert len(result.subtitles) == 2
+
+
+class TestParseSrtStream:
+    """SRT 流式解析测试"""
+
+    CONTENT = (
+        "1\n00:00:00,400 --> 00:00:02,866\n第一条字幕\n\n"
+        "2\n00:00:02,866 --> 00:00:05,166\n第二条\n多行文本\n"
+    )
+
+    async def test_basic(self):
+        """基础解析"""
+        result = await parse_srt_stream(_chunks(self.CONTENT.encode(), 1024))
+
+        assert len(result.subtitles) == 2
+        assert result.duration == 5.166
+        assert result.subtitles[0].text == "第一条字幕"
+        assert result.subtitles[1].text == "第二条\n多行文本"
+
+    @pytest.mark.parametrize("size", [1, 2, 3, 7, 64])
+    async def test_chunk_boundaries(self, size):
+        """任意块边界下与整体解析结果一致（含多字节字符跨块）"""
+        result = await parse_srt_stream(_chunks(self.CONTENT.encode(), size))
+        expected = parse_srt(self.CONTENT)
+
+        assert len(result.subtitles) == len(expected.subtitles)
+        assert result.duration == expected.duration
+        for got, want in zip(result.subtitles, expected.subtitles):
+            assert got.start_time == want.start_time
+            assert got.text == want.text
+
+    async def test_crlf_across_chunks(self):
+        """\\r\\n 被块边界切开"""
+        content = (
+            "1\r\n00:00:00,400 --> 00:00:02,866\r\n测试\r\n\r\n"
+            "2\r\n00:00:03,000 --> 00:00:04,000\r\n第二条\r\n"
+        )
+        result = await parse_srt_stream(_chunks(content.encode(), 1))
+
+        assert len(result.subtitles) == 2
+        assert result.subtitles[0].text == "测试"
+
+    async def test_bom(self):
+        """UTF-8 BOM 被剥离"""
+        data = b"\xef\xbb\xbf" + "1\n00:00:00,000 --> 00:00:01,000\n测试\n".encode()
+        result = await parse_srt_stream(_chunks(data, 4))
+
+        assert result.subtitles[0].index == 1
+
+    async def test_non_utf8_raises(self):
+        """非 UTF-8 内容抛 UnicodeDecodeError（调用方回退全量解码）"""
+        data = "1\n00:00:00,000 --> 00:00:01,000\n中文测试\n".encode("gbk")
+        with pytest.raises(UnicodeDecodeError):
+            await parse_srt_stream(_chunks(data, 8))
+
+    async def test_invalid_block_raises(self):
+        """格式错误块照常报错"""
+        data = b"abc\n00:00:00,000 --> 00:00:01,000\nx\n"
+        with pytest.raises(ValueError, match="序号无效"):
+            await parse_srt_stream(_chunks(data, 8))
+
+    async def test_empty(self):
+        """空字节流"""
+        result = await parse_srt_stream(_chunks(b"", 8))
+
+        assert len(result.subtitles) == 0
+        assert result.duration == 0
@@ -0,0 +1,51 @@
+"""
+[INPUT]: 依赖 pytest, vmarker.settings
+[OUTPUT]: settings 模块测试用例
+[POS]: tests/ 的环境配置测试
+[PROTOCOL]: 变更时更新此头部，然后检查 CLAUDE.md
+"""
+
+import os
+
+from vmarker.settings import load_env
+
+
+class TestLoadEnv:
+    """.env 加载测试"""
+
+    def test_sets_variables(self, tmp_path, monkeypatch):
+        """加载 KEY=VALUE 行"""
+        monkeypatch.delenv("VMARKER_TEST_KEY", raising=False)
+        env = tmp_path / ".env"
+        env.write_text('VMARKER_TEST_KEY="hello"\n', encoding="utf-8")
+
+        load_env(env)
+
+        assert os.environ.pop("VMARKER_TEST_KEY") == "hello"
+
+    def test_does_not_override_existing(self, tmp_path, monkeypatch):
+        """已存在的环境变量不覆盖"""
+        monkeypatch.setenv("VMARKER_TEST_KEY", "original")
+        env = tmp_path / ".env"
+        env.write_text("VMARKER_TEST_KEY=changed\n", encoding="utf-8")
+
+        load_env(env)
+
+        assert os.environ["VMARKER_TEST_KEY"] == "original"
+
+    def test_skips_comments_and_blank_lines(self, tmp_path, monkeypatch):
+        """跳过注释、空行和无 = 的行"""
+        monkeypatch.delenv("VMARKER_TEST_KEY", raising=False)
+        env = tmp_path / ".env"
+        env.write_text(
+            "# 注释\n\nnot-a-pair\nVMARKER_TEST_KEY=value\n",
+            encoding="utf-8",
+        )
+
+        load_env(env)
+
+        assert os.environ.pop("VMARKER_TEST_KEY") == "value"
+
+    def test_missing_file_is_noop(self, tmp_path):
+        """文件不存在时静默返回"""
+        load_env(tmp_path / "missing.env")
@@ -55,6 +55,32 @@ class TestCalculateSegments:
         with pytest.raises(ValueError, match="chunk_seconds must be positive"):
             calculate_segments(duration=60, chunk_seconds=-10)
 
+    def test_float_duration_exact_boundaries(self):
+        """小数时长：边界落在精确毫秒上"""
+        result = calculate_segments(duration=61.1, chunk_seconds=30)
+
+        assert len(result) == 3
+        assert result[2].start == 60.0
+        assert result[2].duration == 1.1
+
+    def test_boundaries_continuous_in_ms(self):
+        """相邻分片毫秒级无缝衔接，总和等于时长"""
+        result = calculate_segments(duration=100.7, chunk_seconds=33)
+
+        total_ms = 0
+        for prev, cur in zip(result, result[1:]):
+            prev_end_ms = round((prev.start + prev.duration) * 1000)
+            assert prev_end_ms == round(cur.start * 1000)
+        total_ms = sum(round(s.duration * 1000) for s in result)
+        assert total_ms == 100700
+
+    def test_float_drift_quantized_to_ms(self):
+        """二进制浮点误差被量化到毫秒"""
+        result = calculate_segments(duration=0.1 + 0.1 + 0.1, chunk_seconds=1)
+
+        assert len(result) == 1
+        assert result[0].duration == 0.3
+
 
 class TestParallelConfig:
     """ParallelConfig 测试"""
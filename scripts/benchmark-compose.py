@@ -13,11 +13,14 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import csv
 import json
 import resource
 import subprocess
 import sys
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -87,6 +90,48 @@ def _parse_args() -> argparse.Namespace:
         choices=("serial", "parallel"),
         help="Run a single mode (used by the wrapper).",
     )
+    parser.add_argument(
+        "--chunk-seconds-sweep",
+        help=(
+            "Comma-separated chunk_seconds values to sweep (parallel mode). "
+            "Runs every combination in-process and emits CSV to stdout."
+        ),
+    )
+    parser.add_argument(
+        "--max-workers-sweep",
+        help=(
+            "Comma-separated max_workers values to sweep (parallel mode). "
+            "Combined with --chunk-seconds-sweep as a Cartesian product."
+        ),
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=0,
+        help=(
+            "Untimed warm-up runs before the measured one (default: 0). "
+            "Stabilizes page cache and ffmpeg startup effects."
+        ),
+    )
+    parser.add_argument(
+        "--concurrent",
+        action="store_true",
+        help=(
+            "Run the serial and parallel legs at the same time "
+            "(implies subprocess isolation). "
+            "Distorts CPU-time comparisons (both legs contend for cores); "
+            "wall_seconds stays valid per leg since each child times itself."
+        ),
+    )
+    parser.add_argument(
+        "--isolate",
+        action="store_true",
+        help=(
+            "Run each leg in a fresh subprocess. Default runs both "
+            "in-process, which skips interpreter startup and re-imports; "
+            "rusage deltas are still bracketed around each leg."
+        ),
+    )
     parser.add_argument(
         "--json",
         action="store_true",
@@ -176,20 +221,34 @@ def _run_mode(args: argparse.Namespace) -> dict[str, object]:
         OverlayPosition.TOP if args.position == "top" else OverlayPosition.BOTTOM
     )
 
+    def _run_once(path: Path) -> None:
+        if args.mode == "serial":
+            _run_serial(args.source, args.bar, path, position)
+        else:
+            _run_parallel(
+                args.source,
+                args.bar,
+                path,
+                position,
+                args.chunk_seconds,
+                args.max_workers,
+                args.gop_multiplier,
+            )
+
+    # Untimed warm-up legs: discard outputs so the measured run reflects
+    # steady-state throughput rather than cold caches and process startup.
+    tmp_dir = Path(tempfile.gettempdir())
+    for index in range(max(0, args.warmup)):
+        warmup_path = tmp_dir / f"benchmark-warmup-{args.mode}-{index}.{output_ext}"
+        warmup_path.unlink(missing_ok=True)
+        try:
+            _run_once(warmup_path)
+        finally:
+            warmup_path.unlink(missing_ok=True)
+
     usage_before = _collect_usage()
     start = time.perf_counter()
-    if args.mode == "serial":
-        _run_serial(args.source, args.bar, output_path, position)
-    else:
-        _run_parallel(
-            args.source,
-            args.bar,
-            output_path,
-            position,
-            args.chunk_seconds,
-            args.max_workers,
-            args.gop_multiplier,
-        )
+    _run_once(output_path)
     end = time.perf_counter()
     usage_after = _collect_usage()
 
@@ -240,17 +299,81 @@ def _run_subprocess(args: argparse.Namespace, mode: str) -> dict[str, object]:
         str(args.gop_multiplier),
         "--output-ext",
         args.output_ext,
+        "--warmup",
+        str(args.warmup),
     ]
     if args.overwrite:
         cmd.append("--overwrite")
 
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        raise RuntimeError(result.stderr.strip() or "benchmark subprocess failed")
-    try:
-        return json.loads(result.stdout.strip())
-    except json.JSONDecodeError as exc:
-        raise RuntimeError("failed to parse benchmark output") from exc
+    # Parse the child's stdout incrementally instead of buffering it whole
+    # (capture_output) and decoding again — sweeps emit sizable payloads.
+    with subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+    ) as proc:
+        assert proc.stdout is not None and proc.stderr is not None
+        try:
+            result = json.load(proc.stdout)
+        except json.JSONDecodeError:
+            result = None
+        stderr = proc.stderr.read()
+        returncode = proc.wait()
+
+    if returncode != 0:
+        raise RuntimeError(stderr.strip() or "benchmark subprocess failed")
+    if result is None:
+        raise RuntimeError("failed to parse benchmark output")
+    return result
+
+
+def _parse_sweep(value: str | None, fallback: int | None) -> list[int | None]:
+    if not value:
+        return [fallback]
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def _run_sweep(args: argparse.Namespace) -> None:
+    """Sweep (chunk_seconds, max_workers) in-process, one CSV row per point.
+
+    Skips the subprocess wrapper on purpose: per-point interpreter startup
+    and import cost would dominate when collecting many data points.
+    """
+    chunk_values = _parse_sweep(args.chunk_seconds_sweep, args.chunk_seconds)
+    worker_values = _parse_sweep(args.max_workers_sweep, args.max_workers)
+
+    writer = csv.writer(sys.stdout)
+    writer.writerow(
+        [
+            "chunk_seconds",
+            "max_workers",
+            "wall_seconds",
+            "cpu_user_seconds",
+            "cpu_system_seconds",
+            "max_rss_kb",
+            "output_bytes",
+        ]
+    )
+    args.mode = "parallel"
+    args.overwrite = True  # every point reuses the same output path
+    for chunk_seconds in chunk_values:
+        for max_workers in worker_values:
+            args.chunk_seconds = chunk_seconds
+            args.max_workers = max_workers
+            result = _run_mode(args)
+            writer.writerow(
+                [
+                    result["chunk_seconds"],
+                    result["max_workers"],
+                    f"{float(result['wall_seconds']):.3f}",
+                    f"{float(result['cpu_user_seconds']):.3f}",
+                    f"{float(result['cpu_system_seconds']):.3f}",
+                    int(result["max_rss_kb"]),
+                    result["output_bytes"],
+                ]
+            )
+            sys.stdout.flush()
 
 
 def _print_human(serial: dict[str, object], parallel: dict[str, object]) -> None:
@@ -307,6 +430,10 @@ def _print_single(result: dict[str, object]) -> None:
 def main() -> int:
     args = _parse_args()
     try:
+        if args.chunk_seconds_sweep or args.max_workers_sweep:
+            _run_sweep(args)
+            return 0
+
         if args.mode:
             result = _run_mode(args)
             if args.json:
@@ -315,8 +442,22 @@ def main() -> int:
                 _print_single(result)
             return 0
 
-        serial = _run_subprocess(args, "serial")
-        parallel = _run_subprocess(args, "parallel")
+        if args.concurrent:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                serial_future = executor.submit(_run_subprocess, args, "serial")
+                parallel_future = executor.submit(_run_subprocess, args, "parallel")
+                serial = serial_future.result()
+                parallel = parallel_future.result()
+        elif args.isolate:
+            serial = _run_subprocess(args, "serial")
+            parallel = _run_subprocess(args, "parallel")
+        else:
+            results: dict[str, dict[str, object]] = {}
+            for mode in ("serial", "parallel"):
+                args.mode = mode
+                results[mode] = _run_mode(args)
+            serial = results["serial"]
+            parallel = results["parallel"]
         if args.json:
             output = {
                 "serial": serial,